@@ -0,0 +1,121 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+class AdmissionRejected(Exception):
+    """Raised when an upload is shed instead of queued; carries the reason and a Retry-After hint"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded work queue in front of resume processing.
+
+    At most `concurrency` slots are held at once and at most `max_queue`
+    more requests wait for theirs, each for up to `queue_timeout` seconds.
+    Anything past that is rejected straight away, so a burst is shed in
+    milliseconds instead of every request timing out behind it. A request
+    doing several jobs' worth of work, like a batch upload, holds several
+    slots (at most `concurrency`).
+    """
+
+    # Weight of the latest request in the running mean of processing time
+    SERVICE_TIME_SMOOTHING = 0.2
+    # Bounds of the Retry-After hint, in seconds
+    MIN_RETRY_AFTER = 1
+    MAX_RETRY_AFTER = 60
+
+    def __init__(self, concurrency=2, max_queue=8, queue_timeout=10.0):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejections = {"queue_full": 0, "queue_timeout": 0, "too_large": 0}
+        self.mean_service_time = 1.0  # seconds a slot is held, until measured
+        self._condition = threading.Condition()
+
+    def retry_after(self):
+        """Seconds a rejected client should wait: roughly how long the current backlog takes to drain"""
+        backlog = self.active + self.waiting + 1
+        estimate = math.ceil(self.mean_service_time * backlog / max(1, self.concurrency))
+        return min(self.MAX_RETRY_AFTER, max(self.MIN_RETRY_AFTER, estimate))
+
+    def check(self):
+        """Raise AdmissionRejected now if a new request would find the queue full
+        
+        Takes no slot, so a caller can shed before the work of finding out
+        how many slots the request needs; slot() still makes the decision.
+        """
+        with self._condition:
+            if (self.active >= self.concurrency or self.waiting) and self.waiting >= self.max_queue:
+                self.rejections["queue_full"] += 1
+                raise AdmissionRejected("queue_full", self.retry_after())
+
+    def _acquire(self, slots):
+        """Take processing slots, waiting in the queue if there is room in it"""
+        with self._condition:
+            # Newcomers queue behind anyone already waiting
+            if self.active + slots <= self.concurrency and not self.waiting:
+                self.active += slots
+                self.admitted += 1
+                return
+            if self.waiting >= self.max_queue:
+                self.rejections["queue_full"] += 1
+                raise AdmissionRejected("queue_full", self.retry_after())
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.active + slots > self.concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejections["queue_timeout"] += 1
+                        raise AdmissionRejected("queue_timeout", self.retry_after())
+                    self._condition.wait(remaining)
+                self.active += slots
+                self.admitted += 1
+            finally:
+                self.waiting -= 1
+
+    def _release(self, slots, service_time):
+        with self._condition:
+            self.active -= slots
+            self.mean_service_time += self.SERVICE_TIME_SMOOTHING * (service_time - self.mean_service_time)
+            # Waiters need different numbers of slots, so each checks whether its own fit
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, weight=1):
+        """Hold weight processing slots for the with-block; raises AdmissionRejected when shedding"""
+        slots = min(max(1, weight), self.concurrency)
+        self._acquire(slots)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(slots, time.monotonic() - started)
+
+    def record_rejection(self, reason):
+        """Count a request turned away before it reached the queue, e.g. an oversized body"""
+        with self._condition:
+            self.rejections[reason] = self.rejections.get(reason, 0) + 1
+
+    def stats(self):
+        """Queue depth and rejection counters for monitoring"""
+        with self._condition:
+            return {
+                "concurrency": self.concurrency,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "queue_depth": self.waiting,
+                "admitted": self.admitted,
+                "rejections": dict(self.rejections),
+                "mean_service_ms": round(self.mean_service_time * 1000, 3),
+            }
@@ -1,28 +1,155 @@
 import os
-import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from flask import Flask, request, jsonify
-from pdfplumber import open as open_pdf
-from docx import Document
+from gemini_client import GeminiClient, GeminiError, CircuitBreaker, DEFAULT_GEMINI_API_URL, payload_cache_key
+from caches import RecommendationCache, SingleFlight
+from model import job_system
+from resume_condenser import condense_resume
+from resume_document import ResumeDocument
+from extractors import extract_resume, sniff_format
 
 app = Flask(__name__)
 
 
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key=" + GEMINI_API_KEY
-
-def extract_text_from_pdf(file):
-    with open_pdf(file) as pdf:
-        text = ""
-        for page in pdf.pages:
-            text += page.extract_text()
-        return text
-
-def extract_text_from_docx(file):
-    doc = Document(file)
-    text = ""
-    for para in doc.paragraphs:
-        text += para.text
-    return text
+GEMINI_API_URL = os.getenv('GEMINI_API_URL', DEFAULT_GEMINI_API_URL)
+
+# Shared client: pooled keep-alive connections, timeouts, retries and a concurrency cap
+gemini_client = GeminiClient(
+    api_url=GEMINI_API_URL,
+    api_key=GEMINI_API_KEY,
+    connect_timeout=float(os.getenv('GEMINI_CONNECT_TIMEOUT', 3.05)),
+    read_timeout=float(os.getenv('GEMINI_READ_TIMEOUT', 20)),
+    max_retries=int(os.getenv('GEMINI_MAX_RETRIES', 2)),
+    max_concurrency=int(os.getenv('GEMINI_MAX_CONCURRENCY', 8))
+)
+
+# Hedged mode: wait at most this long for Gemini before answering with the
+# local keyword engine. 0 always waits for Gemini.
+GEMINI_DEADLINE = float(os.getenv('GEMINI_DEADLINE_MS', 800)) / 1000
+
+# Stop calling Gemini for a while after repeated failures
+gemini_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv('GEMINI_BREAKER_FAILURES', 5)),
+    reset_timeout=float(os.getenv('GEMINI_BREAKER_RESET', 30))
+)
+gemini_executor = ThreadPoolExecutor(max_workers=gemini_client.max_concurrency)
+
+# Hedged calls that may be in flight at once, including ones that missed their
+# deadline and are still running; past this Gemini is skipped, not queued
+GEMINI_MAX_IN_FLIGHT = int(os.getenv('GEMINI_MAX_IN_FLIGHT', 2 * gemini_client.max_concurrency))
+gemini_slots = threading.BoundedSemaphore(GEMINI_MAX_IN_FLIGHT)
+hedging_counters = {"in_flight": 0, "saturated": 0, "deadline_missed": 0}
+hedging_lock = threading.Lock()
+
+def count_hedging(counter, delta=1):
+    """Adjust one hedging counter under the lock"""
+    with hedging_lock:
+        hedging_counters[counter] += delta
+
+def release_gemini_slot(_future=None):
+    """Free a hedged call's slot; also the done callback of its future"""
+    count_hedging("in_flight", -1)
+    gemini_slots.release()
+
+# Identical payloads are answered from the cache, and concurrent identical
+# requests share a single upstream call
+gemini_cache = RecommendationCache(
+    max_bytes=int(os.getenv('GEMINI_CACHE_MB', 32)) * 1024 * 1024,
+    ttl=float(os.getenv('GEMINI_CACHE_TTL', 600))
+)
+gemini_flights = SingleFlight()
+
+# Token budget for the condensed resume sent to Gemini; 0 sends the full text
+GEMINI_PROMPT_TOKEN_BUDGET = int(os.getenv('GEMINI_PROMPT_TOKEN_BUDGET', 512))
+
+def call_gemini(payload):
+    """Call Gemini and report the outcome to the circuit breaker
+    
+    In hedged mode a call slower than GEMINI_DEADLINE counts as a failure:
+    its answer arrives after the user got the local one, so a Gemini that is
+    slow but succeeding still trips the breaker.
+    """
+    started = time.monotonic()
+    try:
+        result = gemini_client.generate(payload)
+    except Exception:
+        gemini_breaker.record_failure()
+        raise
+    if GEMINI_DEADLINE > 0 and time.monotonic() - started > GEMINI_DEADLINE:
+        gemini_breaker.record_failure()
+    else:
+        gemini_breaker.record_success()
+    return result
+
+def coalesced_gemini_call(payload, cache_key):
+    """Call Gemini once per payload key, sharing the result with concurrent callers"""
+    def fetch():
+        result = call_gemini(payload)
+        gemini_cache.put(cache_key, result)
+        return result
+    return gemini_flights.do(cache_key, fetch)
+
+def local_recommendations(document):
+    """Recommendations from the local keyword engine, used when Gemini is slow or failing"""
+    # Stay on one catalog version even if a reload lands mid-request
+    index = job_system.index
+    keyword_recommendations = job_system.get_improved_keyword_recommendations(document, index=index)
+    return job_system.format_recommendations_with_skills(
+        document, keyword_recommendations["recommendations"], index=index)
+
+def hedged_recommendations(payload, cache_key, document, prompt_stats=None):
+    """Race Gemini against the local engine and answer within GEMINI_DEADLINE"""
+    started = time.monotonic()
+    gemini_future = None
+    fallback_reason = "circuit_open"
+    # The slot is taken first: in half-open state allow() claims the breaker's
+    # single trial, which only a call that actually goes out can report back
+    if not gemini_slots.acquire(blocking=False):
+        count_hedging("saturated")
+        fallback_reason = "saturated"
+    elif not gemini_breaker.allow():
+        gemini_slots.release()
+    else:
+        count_hedging("in_flight")
+        try:
+            gemini_future = gemini_executor.submit(coalesced_gemini_call, payload, cache_key)
+        except Exception:
+            release_gemini_slot()
+            gemini_breaker.cancel_trial()
+            raise
+        # The slot is held until the call finishes, even after its deadline
+        gemini_future.add_done_callback(release_gemini_slot)
+    
+    # The local result is computed while Gemini is in flight
+    local = local_recommendations(document)
+    
+    if gemini_future is not None:
+        try:
+            remaining = GEMINI_DEADLINE - (time.monotonic() - started)
+            result = gemini_future.result(timeout=max(0, remaining))
+            return jsonify({"topJobs": result.get('generatedContent', []), "source": "gemini",
+                            "promptStats": prompt_stats}), 200
+        except FutureTimeoutError:
+            # The call keeps running, holding its slot, and counts as a breaker failure when it finishes
+            count_hedging("deadline_missed")
+            fallback_reason = "deadline"
+        except Exception as e:
+            print(f"Gemini call failed, using local recommendations: {e}")
+            fallback_reason = "gemini_error"
+    
+    if "error" in local:
+        return jsonify({"error": "Local recommendations failed", "message": local["error"],
+                        "fallbackReason": fallback_reason}), 500
+    return jsonify({
+        "topJobs": local["jobRecommendations"],
+        "aiInsights": local["aiInsights"],
+        "source": "local",
+        "fallbackReason": fallback_reason,
+        "promptStats": prompt_stats
+    }), 200
 
 @app.route('/dashboard', methods=['POST'])
 def handle_resume_upload():
@@ -33,31 +160,66 @@ def handle_resume_upload():
     file_name = file.filename
     
  
-    if file_name.endswith('.pdf'):
-        resume_text = extract_text_from_pdf(file)
-    elif file_name.endswith('.docx'):
-        resume_text = extract_text_from_docx(file)
-    else:
+    # The file's content picks the extractor, not the name the client sent
+    if sniff_format(file) not in ('pdf', 'docx'):
         return jsonify({"error": "Invalid file format. Only PDF and DOCX are supported."}), 400
+    resume_text, extraction = extract_resume(file, file_name)
+    if not resume_text.strip():
+        # Corrupt files and zips that are not DOCX come back empty with the reason in metadata
+        return jsonify({"error": "Failed to extract text from resume",
+                        "message": extraction.get("error", "no text found")}), 422
     
   
+    # Normalized and matched once, shared by the condenser and the local engine
+    document = ResumeDocument(resume_text, file_name)
+    
+    # Send Gemini a compact summary of skills, titles and recent roles
+    prompt_text, prompt_stats = resume_text, None
+    if GEMINI_PROMPT_TOKEN_BUDGET > 0:
+        prompt_text, prompt_stats = condense_resume(document, job_system, token_budget=GEMINI_PROMPT_TOKEN_BUDGET)
+        print(f"Condensed resume for Gemini: saved {prompt_stats['chars_saved']} characters, "
+              f"~{prompt_stats['tokens_saved']} tokens")
+    
     payload = {
         "input": {
-            "text": resume_text
+            "text": prompt_text
         }
     }
 
+    cache_key = payload_cache_key(payload)
+    cached = gemini_cache.get(cache_key)
+    if cached is not None:
+        return jsonify({"topJobs": cached.get('generatedContent', []), "source": "gemini",
+                        "cached": True, "promptStats": prompt_stats}), 200
+    
+    if GEMINI_DEADLINE > 0:
+        return hedged_recommendations(payload, cache_key, document, prompt_stats)
+    
     try:
-        response = requests.post(GEMINI_API_URL, json=payload)
-        if response.status_code == 200:
-            result = response.json()
-            # Extract relevant data from Gemini API response
-            job_matches = result.get('generatedContent', [])
-            return jsonify({"topJobs": job_matches}), 200
-        else:
+        result = coalesced_gemini_call(payload, cache_key)
+        # Extract relevant data from Gemini API response
+        job_matches = result.get('generatedContent', [])
+        return jsonify({"topJobs": job_matches, "promptStats": prompt_stats}), 200
+    except GeminiError as e:
+        if e.status_code is not None:
             return jsonify({"error": "Failed to get response from Gemini API"}), 500
+        return jsonify({"error": f"Error while calling Gemini API: {str(e)}"}), 500
     except Exception as e:
         return jsonify({"error": f"Error while calling Gemini API: {str(e)}"}), 500
 
+@app.route('/gemini_status', methods=['GET'])
+def gemini_status():
+    """Gemini client and circuit breaker counters"""
+    return jsonify({
+        "client": gemini_client.stats(),
+        "circuitBreaker": gemini_breaker.stats(),
+        "responseCache": gemini_cache.stats(),
+        "coalescing": gemini_flights.stats(),
+        "deadlineMs": int(GEMINI_DEADLINE * 1000),
+        "hedging": {"inFlight": hedging_counters["in_flight"], "maxInFlight": GEMINI_MAX_IN_FLIGHT,
+                    "saturated": hedging_counters["saturated"],
+                    "deadlineMissed": hedging_counters["deadline_missed"]}
+    })
+
 if __name__ == '__main__':
     app.run(debug=True)
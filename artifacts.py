@@ -0,0 +1,326 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+# numpy is imported where arrays are needed, so readers of plain integer
+# tables (see Artifact.values) can load an artifact without it
+
+# Artifact layout: MAGIC, an 8-byte little-endian header length, a JSON
+# header, then the raw arrays, each starting on an ALIGNMENT boundary. The
+# arrays are read straight out of a read-only memory map, so every worker
+# process on a host shares the same page cache copy and nothing is unpickled.
+MAGIC = b"JRSARTF\x00"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+MODEL_ARTIFACT_PATH = "job_recommendation_model.artifact"
+VECTORIZER_ARTIFACT_PATH = "vectorizer.artifact"
+
+
+# numpy dtype strings that memoryview.cast understands, for little-endian hosts
+_MEMORYVIEW_FORMATS = {"|u1": "B", "|i1": "b", "<i4": "i", "<u4": "I", "<i8": "q", "<f8": "d"}
+
+
+class ArtifactError(Exception):
+    """Raised when an artifact is missing, corrupt, of the wrong kind or from an unknown format version"""
+
+
+def _padding(offset):
+    """Bytes needed to move offset up to the next ALIGNMENT boundary"""
+    return -offset % ALIGNMENT
+
+
+def write_artifact(path, kind, arrays, metadata=None):
+    """Write named numpy arrays and JSON metadata to path as a memory-mappable artifact.
+
+    The file is written next to path and renamed into place, so readers never
+    see a half-written artifact.
+    """
+    import numpy as np
+
+    layout = {}
+    offset = 0
+    blobs = []
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        if array.dtype.hasobject:
+            raise ArtifactError(f"array {name} has dtype object and cannot be memory-mapped")
+        offset += _padding(offset)
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        blobs.append((offset, array.tobytes()))
+        offset += array.nbytes
+
+    data = bytearray(offset)
+    for start, blob in blobs:
+        data[start:start + len(blob)] = blob
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "kind": kind,
+        "metadata": metadata or {},
+        "arrays": layout,
+        "data_bytes": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
+    encoded = json.dumps(header, sort_keys=True).encode("utf-8")
+    encoded += b" " * _padding(len(MAGIC) + 8 + len(encoded))
+
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(encoded)
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+class Artifact:
+    """Read-only, memory-mapped view of an artifact file"""
+
+    def __init__(self, path, kind=None, verify=True):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ArtifactError(f"{path} is not a model artifact")
+            header_length = int.from_bytes(f.read(8), "little")
+            try:
+                header = json.loads(f.read(header_length))
+            except ValueError as e:
+                raise ArtifactError(f"{path} has a corrupt header: {e}")
+            if header.get("format_version") != FORMAT_VERSION:
+                raise ArtifactError(f"{path} has format version {header.get('format_version')}, "
+                                    f"expected {FORMAT_VERSION}")
+            if kind is not None and header.get("kind") != kind:
+                raise ArtifactError(f"{path} holds a {header.get('kind')}, expected a {kind}")
+            data_start = len(MAGIC) + 8 + header_length
+            if os.fstat(f.fileno()).st_size != data_start + header["data_bytes"]:
+                raise ArtifactError(f"{path} is truncated")
+            # Shared, read-only mapping: the kernel keeps one copy for all workers
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if header["data_bytes"] else None
+
+        self.kind = header["kind"]
+        self.metadata = header["metadata"]
+        self._data = memoryview(self._map)[data_start:] if self._map is not None else memoryview(b"")
+        if verify and hashlib.sha256(self._data).hexdigest() != header["sha256"]:
+            raise ArtifactError(f"{path} failed its checksum")
+        self._layout = header["arrays"]
+
+    def values(self, name):
+        """Zero-copy read-only memoryview of a stored 1-D array, without importing numpy"""
+        spec = self._layout[name]
+        code = _MEMORYVIEW_FORMATS.get(spec["dtype"])
+        if code is None or len(spec["shape"]) != 1 or sys.byteorder != "little":
+            return memoryview(self.array(name))
+        size = struct.calcsize(code)
+        return self._data[spec["offset"]:spec["offset"] + spec["shape"][0] * size].cast(code)
+
+    def array(self, name):
+        """Zero-copy read-only numpy view of one stored array"""
+        import numpy as np
+
+        spec = self._layout[name]
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        return np.frombuffer(self._data, dtype=dtype, count=count, offset=spec["offset"]).reshape(spec["shape"])
+
+
+class ForestModel:
+    """predict_proba/predict for a RandomForestClassifier evaluated directly on memory-mapped node arrays.
+
+    Every tree's nodes are concatenated into flat arrays, and all trees are
+    walked level by level for a whole batch of samples at once.
+    """
+
+    def __init__(self, artifact):
+        import numpy as np
+
+        self.artifact = artifact
+        self.classes_ = np.asarray(artifact.metadata["classes"])
+        self.n_features_in_ = artifact.metadata["n_features"]
+        self.params = artifact.metadata["params"]
+        self.roots = artifact.array("roots")
+        self.children_left = artifact.array("children_left")
+        self.children_right = artifact.array("children_right")
+        self.feature = artifact.array("feature")
+        self.threshold = artifact.array("threshold")
+        self.missing_go_to_left = artifact.array("missing_go_to_left")
+        self.leaf_proba = artifact.array("leaf_proba")
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def predict_proba(self, X):
+        """Mean class probabilities over every tree, shape (n_samples, n_classes)"""
+        import numpy as np
+
+        # sklearn trees compare float32 features against their thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has shape {X.shape}, expected (n_samples, {self.n_features_in_})")
+
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        while True:
+            internal = self.children_left[nodes] != -1
+            if not internal.any():
+                break
+            values = X[rows, np.maximum(self.feature[nodes], 0)]
+            go_left = np.where(np.isnan(values), self.missing_go_to_left[nodes].astype(bool),
+                               values <= self.threshold[nodes])
+            children = np.where(go_left, self.children_left[nodes], self.children_right[nodes])
+            nodes = np.where(internal, children, nodes)
+        return self.leaf_proba[nodes].mean(axis=1)
+
+    def predict(self, X):
+        """Most probable class for each sample"""
+        import numpy as np
+
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def convert_model(model, path):
+    """Write a fitted single-output RandomForestClassifier as a forest artifact"""
+    import numpy as np
+
+    if getattr(model, "n_outputs_", 1) != 1:
+        raise ArtifactError("only single-output classifiers can be converted")
+
+    roots, left, right, feature, threshold, missing_left, proba = [], [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        roots.append(offset)
+        # Child indices become positions in the concatenated arrays
+        left.append(np.where(is_leaf, -1, tree.children_left + offset))
+        right.append(np.where(is_leaf, -1, tree.children_right + offset))
+        feature.append(tree.feature)
+        threshold.append(tree.threshold)
+        missing = getattr(tree, "missing_go_to_left", None)
+        missing_left.append(missing if missing is not None else np.zeros(tree.node_count, dtype=np.uint8))
+        # Same normalization as DecisionTreeClassifier.predict_proba
+        values = tree.value[:, 0, :len(model.classes_)].astype(np.float64)
+        totals = values.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1
+        proba.append(values / totals)
+        offset += tree.node_count
+
+    arrays = {
+        "roots": np.array(roots, dtype=np.int64),
+        "children_left": np.concatenate(left).astype(np.int64),
+        "children_right": np.concatenate(right).astype(np.int64),
+        "feature": np.concatenate(feature).astype(np.int64),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "missing_go_to_left": np.concatenate(missing_left).astype(np.uint8),
+        "leaf_proba": np.concatenate(proba),
+    }
+    metadata = {
+        "classes": model.classes_.tolist(),
+        "n_features": int(model.n_features_in_),
+        "params": {key: value for key, value in model.get_params().items()
+                   if value is None or isinstance(value, (bool, int, float, str))},
+    }
+    write_artifact(path, "random_forest", arrays, metadata)
+
+
+def load_model(path, verify=True):
+    """Memory-map a forest artifact as a ForestModel"""
+    return ForestModel(Artifact(path, kind="random_forest", verify=verify))
+
+
+def convert_vectorizer(vectorizer, path):
+    """Write a fitted TfidfVectorizer's vocabulary, idf and settings as an artifact"""
+    import numpy as np
+
+    params = vectorizer.get_params()
+    for key in ("tokenizer", "preprocessor", "analyzer"):
+        if callable(params.get(key)):
+            raise ArtifactError(f"vectorizers with a custom {key} cannot be converted")
+    if not isinstance(params.get("stop_words"), (str, type(None))):
+        params["stop_words"] = sorted(params["stop_words"])
+    params["dtype"] = np.dtype(params["dtype"]).name
+    params["ngram_range"] = list(params["ngram_range"])
+    params.pop("vocabulary", None)
+
+    # Terms are stored in column order as one UTF-8 blob plus end offsets
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    encoded = [term.encode("utf-8") for term in terms]
+    arrays = {
+        "term_bytes": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "term_ends": np.cumsum([len(term) for term in encoded], dtype=np.int64),
+        "idf": np.asarray(vectorizer.idf_, dtype=np.float64),
+    }
+    write_artifact(path, "tfidf_vectorizer", arrays, {"params": params})
+
+
+def load_vocabulary(artifact):
+    """Term list of a vectorizer artifact in column order"""
+    blob = artifact.array("term_bytes").tobytes()
+    terms = []
+    start = 0
+    for end in artifact.array("term_ends").tolist():
+        terms.append(blob[start:end].decode("utf-8"))
+        start = end
+    return terms
+
+
+def load_vectorizer(path, verify=True):
+    """Rebuild a fitted TfidfVectorizer from an artifact, idf_ stays memory-mapped"""
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    artifact = Artifact(path, kind="tfidf_vectorizer", verify=verify)
+    params = dict(artifact.metadata["params"])
+    params["dtype"] = np.dtype(params["dtype"]).type
+    params["ngram_range"] = tuple(params["ngram_range"])
+    vocabulary = {term: i for i, term in enumerate(load_vocabulary(artifact))}
+    vectorizer = TfidfVectorizer(vocabulary=vocabulary, **params)
+    # Fixed vocabulary plus stored idf is a fitted vectorizer, no refit needed
+    vectorizer._validate_vocabulary()
+    vectorizer.idf_ = artifact.array("idf")
+    return vectorizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert pickled model artifacts to the memory-mappable format")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = commands.add_parser("convert", help="convert the pickled model and vectorizer")
+    convert_parser.add_argument("--model", default="job_recommendation_model.pkl")
+    convert_parser.add_argument("--vectorizer", default="vectorizer.pkl")
+    convert_parser.add_argument("--model-out", default=MODEL_ARTIFACT_PATH)
+    convert_parser.add_argument("--vectorizer-out", default=VECTORIZER_ARTIFACT_PATH)
+
+    verify_parser = commands.add_parser("verify", help="check the version and checksum of artifacts")
+    verify_parser.add_argument("paths", nargs="+")
+
+    args = parser.parse_args()
+    if args.command == "convert":
+        # Only convert pickles you trust: unpickling can run arbitrary code
+        import pickle
+        with open(args.model, "rb") as f:
+            convert_model(pickle.load(f), args.model_out)
+        print(f"Model artifact written to {args.model_out}")
+        with open(args.vectorizer, "rb") as f:
+            convert_vectorizer(pickle.load(f), args.vectorizer_out)
+        print(f"Vectorizer artifact written to {args.vectorizer_out}")
+        return 0
+
+    status = 0
+    for path in args.paths:
+        try:
+            artifact = Artifact(path)
+            print(f"{path}: ok ({artifact.kind}, format version {FORMAT_VERSION})")
+        except (OSError, ArtifactError) as e:
+            print(f"{path}: {e}")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
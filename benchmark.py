@@ -0,0 +1,404 @@
+"""Performance checks for the recommendation service.
+
+    python benchmark.py startup [--runs 5] [--import-budget 0.5] [--first-request-budget 1.0]
+    python benchmark.py docx [--paragraphs 50000] [--tables 500] [--runs 3]
+    python benchmark.py pdf [--corpus DIR] [--runs 3]
+    python benchmark.py text [--megabytes 20] [--runs 3]
+
+startup boots model.py in fresh interpreters, the way a scale-to-zero
+function does, and measures the import time and the latency of the first
+/upload_resume request. It exits with status 1 when the median of either
+measurement is over its budget.
+
+docx writes a large generated DOCX and extracts it with python-docx and
+with the streaming extractor, each in a fresh interpreter, reporting time
+and peak memory growth (Linux only). It needs python-docx installed.
+
+pdf extracts every PDF in a fixture corpus with each PDF backend and with
+the fast-path-with-fallback extractor the service uses, each in a fresh
+interpreter, reporting time, characters and words per file. Without
+--corpus it writes a generated corpus: plain and TeX-style kerned resumes,
+a long report and a page with no text layer.
+
+text writes a large generated plain text resume and matches it read whole
+and streamed in chunks, each in a fresh interpreter, reporting time and
+peak memory growth (Linux only).
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs inside a fresh interpreter and prints one JSON line of timings
+STARTUP_PROBE = r"""
+import contextlib, io, json, sys, time
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    import model
+imported = time.perf_counter()
+resume = ("Software engineer with python, java, sql, git, docker and aws experience. "
+          "Built rest api backends and react frontends. Run %s." % sys.argv[1]).encode()
+client = model.app.test_client()
+with contextlib.redirect_stdout(io.StringIO()):
+    response = client.post("/upload_resume", data={"resume_file": (io.BytesIO(resume), "resume.txt")},
+                           content_type="multipart/form-data")
+answered = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_request": answered - imported,
+                  "status": response.status_code, "modules": len(sys.modules)}))
+"""
+
+
+def run_startup_probe(run, env):
+    """Boot model.py once in a new interpreter and return its timings"""
+    completed = subprocess.run([sys.executable, "-c", STARTUP_PROBE, str(run)], cwd=REPO_DIR, env=env,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"startup probe failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def startup(args):
+    """Measure cold import and first-request latency against their budgets"""
+    env = dict(os.environ)
+    env.setdefault("FAST_START", "1")
+    results = [run_startup_probe(run, env) for run in range(args.runs)]
+    failed = [r for r in results if r["status"] != 200]
+    if failed:
+        print(f"First request failed with status {failed[0]['status']}")
+        return 1
+
+    over_budget = False
+    for name, budget in (("import", args.import_budget), ("first_request", args.first_request_budget)):
+        samples = [r[name] for r in results]
+        median = statistics.median(samples)
+        verdict = "ok" if median <= budget else "OVER BUDGET"
+        over_budget = over_budget or median > budget
+        print(f"{name:>14}: median {median * 1000:7.1f} ms  max {max(samples) * 1000:7.1f} ms  "
+              f"budget {budget * 1000:7.1f} ms  {verdict}")
+    print(f"{'modules':>14}: {results[0]['modules']} loaded after the first request "
+          f"(FAST_START={env['FAST_START']}, {args.runs} runs)")
+    return 1 if over_budget else 0
+
+
+# Runs inside a fresh interpreter: extract one DOCX with one backend and print timings
+DOCX_PROBE = r"""
+import json, sys, time
+path, backend = sys.argv[1], sys.argv[2]
+def high_water_kb():
+    # VmHWM starts fresh at exec; ru_maxrss would include the parent's peak
+    with open("/proc/self/status") as f:
+        return int(next(line for line in f if line.startswith("VmHWM:")).split()[1])
+if backend == "python-docx":
+    import docx
+    def extract():
+        return "\n".join(paragraph.text for paragraph in docx.Document(path).paragraphs)
+else:
+    from extractors import extract_docx_text
+    def extract():
+        return extract_docx_text(path)[0]
+baseline = high_water_kb()
+start = time.perf_counter()
+text = extract()
+elapsed = time.perf_counter() - start
+peak = high_water_kb()
+print(json.dumps({"seconds": elapsed, "peak_growth_kb": peak - baseline, "chars": len(text)}))
+"""
+
+DOCX_BACKENDS = ("python-docx", "streaming")
+
+
+def make_large_docx(path, paragraphs, tables):
+    """Write a DOCX with many paragraphs, skill tables and a header"""
+    import docx
+    from xml.sax.saxutils import escape
+
+    template = docx.Document()
+    template.sections[0].header.paragraphs[0].text = "Jane Doe - jane.doe@example.com"
+    template.add_paragraph("placeholder")
+    buffer = io.BytesIO()
+    template.save(buffer)
+
+    line = ("Led a team of engineers building python, sql and docker services; "
+            "improved data analysis pipelines and project management practices. Item %d")
+    body = []
+    table_every = max(1, paragraphs // max(1, tables)) if tables else 0
+    for i in range(paragraphs):
+        body.append('<w:p><w:r><w:t xml:space="preserve">%s</w:t></w:r></w:p>' % escape(line % i))
+        if table_every and i % table_every == 0:
+            cells = "".join('<w:tc><w:p><w:r><w:t>%s</w:t></w:r></w:p></w:tc>' % escape(cell)
+                            for cell in ("Skills", "Kubernetes, Terraform, Tableau %d" % i))
+            body.append("<w:tbl><w:tr>%s</w:tr></w:tbl>" % cells)
+
+    with zipfile.ZipFile(buffer) as source, zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            data = source.read(info.filename)
+            if info.filename == "word/document.xml":
+                xml = data.decode("utf-8")
+                start = xml.index("<w:body>") + len("<w:body>")
+                end = xml.index("<w:sectPr")
+                data = (xml[:start] + "".join(body) + xml[end:]).encode("utf-8")
+            target.writestr(info, data)
+
+
+def run_docx_probe(path, backend):
+    """Extract path with one backend in a new interpreter and return its timings"""
+    completed = subprocess.run([sys.executable, "-c", DOCX_PROBE, path, backend], cwd=REPO_DIR,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"docx probe failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def docx_benchmark(args):
+    """Compare python-docx with the streaming DOCX extractor on a large document"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "large.docx")
+        make_large_docx(path, args.paragraphs, args.tables)
+        print(f"{'document':>14}: {args.paragraphs} paragraphs, {args.tables} tables, "
+              f"{os.path.getsize(path) / 1024:.0f} KB zipped")
+        for backend in DOCX_BACKENDS:
+            results = [run_docx_probe(path, backend) for _ in range(args.runs)]
+            seconds = statistics.median(r["seconds"] for r in results)
+            memory = statistics.median(r["peak_growth_kb"] for r in results)
+            print(f"{backend:>14}: median {seconds * 1000:8.1f} ms  peak memory +{memory / 1024:7.1f} MB  "
+                  f"{results[0]['chars']} chars")
+    return 0
+
+
+# Runs inside a fresh interpreter: extract every PDF with one backend and print per-file results
+PDF_PROBE = r"""
+import json, statistics, sys, time
+paths, backend, runs = sys.argv[3:], sys.argv[1], int(sys.argv[2])
+from extractors import extract_pdf, extract_pdf_text
+results = {}
+for path in paths:
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        if backend == "auto":
+            text, metadata = extract_pdf(path)
+        else:
+            text, metadata = extract_pdf_text(path, backend=backend)
+        seconds.append(time.perf_counter() - start)
+    results[path] = {"seconds": statistics.median(seconds), "chars": len(text), "words": len(text.split()),
+                     "backend": metadata["backend"], "fallback": metadata.get("fallback")}
+print(json.dumps(results))
+"""
+
+PDF_BENCHMARK_BACKENDS = ("pdfminer", "pdfplumber", "auto")
+
+PDF_FIXTURE_LINES = (
+    "Jane Doe - Senior Data Scientist - jane.doe@example.com",
+    "Skills: python, sql, machine learning, deep learning, tableau, docker, kubernetes",
+    "Experience: led a team of engineers building data analysis pipelines on aws",
+    "Built rest api backends with flask and react frontends; project management with jira",
+    "Education: B.S. Computer Science, University of the Philippines",
+)
+
+
+def _pdf_string(text):
+    """text as a PDF literal string"""
+    return "(%s)" % text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_text_pdf(path, pages, lines_per_page=50, kerned=False, text_layer=True):
+    """Write a PDF of Helvetica text lines without any PDF library
+    
+    kerned=True places each word with a TJ offset instead of a space
+    character, the way TeX does. text_layer=False draws a shape and no
+    text, like a scanned page.
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    kids = []
+    for page in range(pages):
+        if text_layer:
+            operators = ["BT /F1 10 Tf 13 TL 50 760 Td"]
+            for i in range(lines_per_page):
+                line = "%s (page %d)" % (PDF_FIXTURE_LINES[i % len(PDF_FIXTURE_LINES)], page + 1)
+                if kerned:
+                    operators.append("[%s] TJ T*" % " -280 ".join(_pdf_string(word) for word in line.split()))
+                else:
+                    operators.append("%s Tj T*" % _pdf_string(line))
+            operators.append("ET")
+        else:
+            operators = ["0.5 g 50 400 400 300 re f"]
+        content = "\n".join(operators)
+        objects.append("<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        objects.append("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                       "/Resources << /Font << /F1 3 0 R >> >> >>" % len(objects))
+        kids.append("%d 0 R" % len(objects))
+    objects[1] = "<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(kids), len(kids))
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(output.tell())
+        output.write(("%d 0 obj\n%s\nendobj\n" % (number, body)).encode("latin-1"))
+    xref = output.tell()
+    output.write(("xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)).encode("latin-1"))
+    output.write("".join("%010d 00000 n \n" % offset for offset in offsets).encode("latin-1"))
+    output.write(("trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                  % (len(objects) + 1, xref)).encode("latin-1"))
+    with open(path, "wb") as f:
+        f.write(output.getvalue())
+
+
+def make_pdf_corpus(directory):
+    """Write the generated PDF fixture corpus and return the file paths"""
+    fixtures = {
+        "resume-1p.pdf": dict(pages=1),
+        "resume-2p-kerned.pdf": dict(pages=2, kerned=True),
+        "report-40p.pdf": dict(pages=40),
+        "scanned-1p.pdf": dict(pages=1, text_layer=False),
+    }
+    paths = []
+    for name, options in fixtures.items():
+        paths.append(os.path.join(directory, name))
+        make_text_pdf(paths[-1], **options)
+    return paths
+
+
+def run_pdf_probe(paths, backend, runs):
+    """Extract paths with one backend in a new interpreter and return per-file results"""
+    completed = subprocess.run([sys.executable, "-c", PDF_PROBE, backend, str(runs)] + paths, cwd=REPO_DIR,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"pdf probe failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def pdf_benchmark(args):
+    """Compare the PDF backends and the fallback extractor on a fixture corpus"""
+    with tempfile.TemporaryDirectory() as directory:
+        if args.corpus:
+            paths = sorted(os.path.join(args.corpus, name) for name in os.listdir(args.corpus)
+                           if name.lower().endswith(".pdf"))
+        else:
+            paths = make_pdf_corpus(directory)
+        results = {backend: run_pdf_probe(paths, backend, args.runs) for backend in PDF_BENCHMARK_BACKENDS}
+
+    for path in paths:
+        print(os.path.basename(path))
+        for backend in PDF_BENCHMARK_BACKENDS:
+            result = results[backend][path]
+            chosen = f"  used {result['backend']}" if backend == "auto" else ""
+            if backend == "auto" and result["fallback"]:
+                chosen += f", pdfplumber tried ({result['fallback']})"
+            print(f"{backend:>14}: median {result['seconds'] * 1000:8.1f} ms  {result['chars']:7d} chars  "
+                  f"{result['words']:6d} words{chosen}")
+    for backend in PDF_BENCHMARK_BACKENDS:
+        total = sum(result["seconds"] for result in results[backend].values())
+        print(f"{'total ' + backend:>20}: {total * 1000:8.1f} ms over {len(paths)} files")
+    return 0
+
+
+# Runs inside a fresh interpreter: match one text file read whole or streamed and print timings
+TEXT_PROBE = r"""
+import contextlib, io, json, sys, time
+path, mode = sys.argv[1], sys.argv[2]
+def high_water_kb():
+    with open("/proc/self/status") as f:
+        return int(next(line for line in f if line.startswith("VmHWM:")).split()[1])
+with contextlib.redirect_stdout(io.StringIO()):
+    from model import job_system
+    from extractors import extract_resume, iter_text_chunks
+    from resume_document import ResumeDocument
+    index = job_system.index
+    index.skill_matcher.scan("warm up")
+baseline = high_water_kb()
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    if mode == "whole":
+        document = ResumeDocument(extract_resume(path)[0], path)
+        document.match(index)
+    else:
+        document = ResumeDocument.from_chunks(iter_text_chunks(path), index, path)
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "peak_growth_kb": high_water_kb() - baseline,
+                  "skills": len(document.extracted_skills)}))
+"""
+
+TEXT_MODES = ("whole", "streamed")
+
+
+def make_large_text(path, megabytes):
+    """Write a plain text resume of about megabytes MB, like a concatenated profile export"""
+    line = ("Senior engineer: python, sql, machine learning and docker on aws; "
+            "led project management for data analysis teams. Profile %d\n")
+    with open(path, "w", encoding="utf-8") as f:
+        written = 0
+        i = 0
+        while written < megabytes * 1024 * 1024:
+            written += f.write(line % i)
+            i += 1
+
+
+def run_text_probe(path, mode):
+    """Match path in one mode in a new interpreter and return its timings"""
+    env = dict(os.environ)
+    env.setdefault("FAST_START", "1")
+    env["CATALOG_WATCH_INTERVAL"] = "0"
+    env["EXTRACTION_SANDBOX_WORKERS"] = "0"
+    completed = subprocess.run([sys.executable, "-c", TEXT_PROBE, path, mode], cwd=REPO_DIR, env=env,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"text probe failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def text_benchmark(args):
+    """Compare matching a large plain text resume read whole and streamed"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "large.txt")
+        make_large_text(path, args.megabytes)
+        print(f"{'document':>14}: {os.path.getsize(path) / 1024 / 1024:.1f} MB of text")
+        for mode in TEXT_MODES:
+            results = [run_text_probe(path, mode) for _ in range(args.runs)]
+            seconds = statistics.median(r["seconds"] for r in results)
+            memory = statistics.median(r["peak_growth_kb"] for r in results)
+            print(f"{mode:>14}: median {seconds * 1000:8.1f} ms  peak memory +{memory / 1024:7.1f} MB  "
+                  f"{results[0]['skills']} skills")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    startup_parser = commands.add_parser("startup", help="cold import and first-request latency")
+    startup_parser.add_argument("--runs", type=int, default=5)
+    startup_parser.add_argument("--import-budget", type=float, default=0.5, help="seconds")
+    startup_parser.add_argument("--first-request-budget", type=float, default=1.0, help="seconds")
+    startup_parser.set_defaults(handler=startup)
+
+    docx_parser = commands.add_parser("docx", help="python-docx versus the streaming DOCX extractor")
+    docx_parser.add_argument("--paragraphs", type=int, default=50000)
+    docx_parser.add_argument("--tables", type=int, default=500)
+    docx_parser.add_argument("--runs", type=int, default=3)
+    docx_parser.set_defaults(handler=docx_benchmark)
+
+    pdf_parser = commands.add_parser("pdf", help="PDF extraction backends on a fixture corpus")
+    pdf_parser.add_argument("--corpus", help="directory of PDFs to use instead of the generated fixtures")
+    pdf_parser.add_argument("--runs", type=int, default=3)
+    pdf_parser.set_defaults(handler=pdf_benchmark)
+
+    text_parser = commands.add_parser("text", help="large plain text matched whole versus streamed")
+    text_parser.add_argument("--megabytes", type=float, default=20)
+    text_parser.add_argument("--runs", type=int, default=3)
+    text_parser.set_defaults(handler=text_benchmark)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def content_hash(source):
+    """SHA-256 of a resume given as a path, bytes or seekable stream.
+
+    Streams are hashed in chunks and rewound so they can still be parsed.
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray)):
+        digest.update(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    else:
+        stream = getattr(source, "stream", source)
+        start = stream.tell()
+        for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+        stream.seek(start)
+    return digest.hexdigest()
+
+
+def _estimate_size(value):
+    """Approximate memory cost of a cached result in bytes"""
+    return len(json.dumps(value, default=str).encode("utf-8"))
+
+
+class RecommendationCache:
+    """Thread-safe LRU cache with a TTL and a memory cap measured in bytes"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=3600):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, size, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.current_bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value under key, evicting least recently used entries to fit"""
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self.current_bytes += size
+        return True
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Counters for monitoring the cache"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class ExtractedTextCache:
+    """SQLite store of extracted resume text and its extraction metadata, keyed by
+    content hash and extractor version.
+
+    The database lives on local disk, so it survives restarts and is shared by
+    every worker process on the host (WAL mode lets readers and a writer overlap).
+    """
+
+    def __init__(self, path="extracted_text_cache.sqlite3", max_entries=50000, prune_every=500):
+        # Connections open lazily, so a relative path is pinned to today's working directory
+        self.path = os.path.abspath(path)
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _connection(self):
+        """One connection per process; forked workers open their own"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS extracted_text ("
+                " content_hash TEXT NOT NULL,"
+                " extractor_version TEXT NOT NULL,"
+                " text TEXT NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " metadata TEXT NOT NULL DEFAULT '{}',"
+                " PRIMARY KEY (content_hash, extractor_version))")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(extracted_text)")]
+            if "metadata" not in columns:
+                # Caches written before metadata was stored
+                conn.execute("ALTER TABLE extracted_text ADD COLUMN metadata TEXT NOT NULL DEFAULT '{}'")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS extracted_text_accessed ON extracted_text (accessed_at)")
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def get(self, content_hash, extractor_version):
+        """Return cached (text, metadata), or None on a miss or database error"""
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT text, metadata FROM extracted_text WHERE content_hash = ? AND extractor_version = ?",
+                    (content_hash, extractor_version)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute(
+                    "UPDATE extracted_text SET accessed_at = ? WHERE content_hash = ? AND extractor_version = ?",
+                    (time.time(), content_hash, extractor_version))
+                conn.commit()
+                self.hits += 1
+                return row[0], json.loads(row[1])
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Warning: Extracted text cache read failed: {e}")
+            self.errors += 1
+            return None
+
+    def put(self, content_hash, extractor_version, text, metadata=None):
+        """Store extracted text and metadata, pruning least recently used rows now and then"""
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO extracted_text"
+                    " (content_hash, extractor_version, text, accessed_at, metadata) VALUES (?, ?, ?, ?, ?)",
+                    (content_hash, extractor_version, text, time.time(), json.dumps(metadata or {})))
+                self._puts += 1
+                if self._puts % self.prune_every == 0:
+                    conn.execute(
+                        "DELETE FROM extracted_text WHERE rowid IN ("
+                        " SELECT rowid FROM extracted_text ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Warning: Extracted text cache write failed: {e}")
+            self.errors += 1
+
+    def stats(self):
+        """Counters for this process"""
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+
+class SingleFlight:
+    """Merges concurrent calls for the same key so only one of them does the work"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.merged = 0
+
+    def do(self, key, fn):
+        """Run fn() for key, or wait for the call already in flight and share its outcome"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.executions += 1
+            else:
+                self.merged += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self):
+        """Counters for monitoring request coalescing"""
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executions": self.executions,
+                "merged": self.merged,
+            }
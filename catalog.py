@@ -0,0 +1,353 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from itertools import islice
+
+from artifacts import Artifact, ArtifactError, write_artifact
+from skill_matcher import SkillMatcher
+
+CATALOG_SOURCE_PATH = "job_catalog.json"
+COMPILED_CATALOG_PATH = "job_catalog.artifact"
+
+# Top-level mappings of a catalog source, keyed by job title
+CATALOG_SECTIONS = ("job_skills", "missing_skills_mapping", "company_mapping")
+
+
+class CatalogError(Exception):
+    """Raised when a catalog source is malformed or no catalog can be found"""
+
+
+class _Pairs(list):
+    """Key/value pairs of a mapping in source order, duplicate keys included"""
+
+
+def _load_yaml(f):
+    """Parse YAML into _Pairs mappings; PyYAML is only needed for YAML catalogs"""
+    try:
+        import yaml
+    except ImportError:
+        raise CatalogError("PyYAML is required for YAML catalogs (pip install pyyaml)")
+
+    class PairsLoader(yaml.SafeLoader):
+        pass
+
+    def construct_pairs(loader, node):
+        loader.flatten_mapping(node)
+        return _Pairs((loader.construct_object(key, deep=True), loader.construct_object(value, deep=True))
+                      for key, value in node.value)
+
+    PairsLoader.add_constructor(yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG, construct_pairs)
+    return yaml.load(f, Loader=PairsLoader)
+
+
+def read_source(path):
+    """Parse a JSON or YAML catalog source, returns (mappings as _Pairs, sha256 of the file)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            source = _load_yaml(data)
+        else:
+            source = json.loads(data, object_pairs_hook=_Pairs)
+    except ValueError as e:
+        raise CatalogError(f"{path} is not valid: {e}")
+    return source, hashlib.sha256(data).hexdigest()
+
+
+def _clean(text):
+    """Strip and collapse whitespace"""
+    return " ".join(text.split())
+
+
+def normalize_catalog(source):
+    """Validate, deduplicate and normalize a parsed catalog source.
+
+    Returns (catalog, warnings). Job titles that differ only in case or
+    whitespace are merged under their most common spelling, duplicate jobs
+    have their lists merged, skills are lowercased and deduplicated per job
+    (skill_labels keeps a display spelling), and companies become strings.
+    Structural problems raise CatalogError.
+    """
+    if not isinstance(source, _Pairs):
+        raise CatalogError("catalog must be a mapping")
+    sections = {}
+    warnings = []
+    for key, value in source:
+        if key in sections:
+            raise CatalogError(f"section {key!r} is defined twice")
+        if key not in CATALOG_SECTIONS:
+            warnings.append(f"unknown section {key!r} ignored")
+            continue
+        if not isinstance(value, _Pairs):
+            raise CatalogError(f"section {key!r} must map job titles to values")
+        sections[key] = value
+    if "job_skills" not in sections:
+        raise CatalogError("catalog has no job_skills section")
+
+    # Pick one spelling per title, the most common across sections
+    spellings = {}
+    for section in CATALOG_SECTIONS:
+        for title, _ in sections.get(section, ()):
+            if not isinstance(title, str) or not _clean(title):
+                raise CatalogError(f"{section} has an invalid job title {title!r}")
+            counts = spellings.setdefault(_clean(title).casefold(), {})
+            counts[_clean(title)] = counts.get(_clean(title), 0) + 1
+    canonical = {}
+    for folded, counts in spellings.items():
+        # max() keeps the first spelling seen on ties
+        canonical[folded] = max(counts, key=counts.get)
+        for spelling in counts:
+            if spelling != canonical[folded]:
+                warnings.append(f"job title {spelling!r} normalized to {canonical[folded]!r}")
+
+    def title_of(section, title):
+        spelled = canonical[_clean(title).casefold()]
+        if spelled != title and _clean(title) == spelled:
+            warnings.append(f"{section}: whitespace trimmed in job title {title!r}")
+        return spelled
+
+    def string_list(section, title, values):
+        if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+            raise CatalogError(f"{section}[{title!r}] must be a list of strings")
+        return values
+
+    job_skills = {}
+    skill_labels = {}
+    for title, skills in sections["job_skills"]:
+        title = title_of("job_skills", title)
+        if title in job_skills:
+            warnings.append(f"job_skills: {title!r} is defined more than once, skill lists merged")
+        merged = job_skills.setdefault(title, [])
+        seen_here = set()
+        for skill in string_list("job_skills", title, skills):
+            label = _clean(skill)
+            if not label:
+                warnings.append(f"job_skills[{title!r}]: empty skill dropped")
+                continue
+            if label != skill:
+                warnings.append(f"job_skills[{title!r}]: whitespace trimmed in skill {skill!r}")
+            key = label.lower()
+            if key in seen_here:
+                warnings.append(f"job_skills[{title!r}]: duplicate skill {label!r} dropped")
+                continue
+            seen_here.add(key)
+            if key not in merged:
+                merged.append(key)
+            # Display spelling: keep acronyms and brand names such as "GAAP" or "Figma"
+            if skill_labels.get(key, key) == key:
+                skill_labels[key] = label
+
+    missing_skills_mapping = {}
+    for title, skills in sections.get("missing_skills_mapping", ()):
+        title = title_of("missing_skills_mapping", title)
+        if title not in job_skills:
+            warnings.append(f"missing_skills_mapping: {title!r} is not in job_skills, dropped")
+            continue
+        if title in missing_skills_mapping:
+            warnings.append(f"missing_skills_mapping: {title!r} is defined more than once, lists merged")
+        merged = missing_skills_mapping.setdefault(title, [])
+        for skill in string_list("missing_skills_mapping", title, skills):
+            label = _clean(skill)
+            if label and label.lower() not in (existing.lower() for existing in merged):
+                merged.append(label)
+
+    company_mapping = {}
+    for title, company in sections.get("company_mapping", ()):
+        title = title_of("company_mapping", title)
+        if title not in job_skills:
+            warnings.append(f"company_mapping: {title!r} is not in job_skills, dropped")
+            continue
+        if title in company_mapping:
+            warnings.append(f"company_mapping: {title!r} is defined more than once, the last entry is kept")
+        if isinstance(company, str):
+            company_mapping[title] = _clean(company)
+        else:
+            # Lists were written as "A, " fragments meant to be concatenated
+            parts = [_clean(part).rstrip(",").strip() for part in string_list("company_mapping", title, company)]
+            company_mapping[title] = ", ".join(part for part in parts if part)
+
+    for title, skills in job_skills.items():
+        if not skills:
+            warnings.append(f"job_skills: {title!r} has no skills")
+
+    catalog = {
+        "job_skills": job_skills,
+        "skill_labels": skill_labels,
+        "missing_skills_mapping": missing_skills_mapping,
+        "company_mapping": company_mapping,
+    }
+    return catalog, warnings
+
+
+def catalog_version(catalog):
+    """Fingerprint of a normalized catalog, used to key cached recommendations"""
+    encoded = json.dumps(catalog, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class CompiledCatalog:
+    """Normalized job catalog with interned skill ids, its skill matcher and postings.
+
+    Skill ids are positions in patterns[:skill_count]; the remaining patterns
+    are job titles that are not also skills.
+    """
+
+    def __init__(self, metadata, matcher, job_skill_ids, skill_jobs):
+        self.metadata = metadata
+        self.catalog_version = metadata["catalog_version"]
+        self.source_sha256 = metadata["source_sha256"]
+        self.titles = metadata["titles"]
+        self.patterns = metadata["patterns"]
+        self.skill_count = metadata["skill_count"]
+        self.skill_labels = metadata["skill_labels"]
+        self.missing_skills_mapping = metadata["missing_skills_mapping"]
+        self.company_mapping = metadata["company_mapping"]
+        self.matcher = matcher
+        # Per job position, its skill ids; per skill id, the job positions using it
+        self.job_skill_ids = job_skill_ids
+        self.skill_jobs = skill_jobs
+        self.job_skills = {title: [self.patterns[skill_id] for skill_id in skill_ids]
+                           for title, skill_ids in zip(self.titles, job_skill_ids)}
+
+    @classmethod
+    def from_catalog(cls, catalog, source_sha256=None):
+        """Intern skills and build the matcher and postings for a normalized catalog"""
+        titles = list(catalog["job_skills"])
+        skill_ids = {}
+        job_skill_ids = []
+        for title in titles:
+            job_skill_ids.append([skill_ids.setdefault(skill, len(skill_ids))
+                                  for skill in catalog["job_skills"][title]])
+        skill_jobs = [[] for _ in skill_ids]
+        for position, ids in enumerate(job_skill_ids):
+            for skill_id in ids:
+                skill_jobs[skill_id].append(position)
+
+        patterns = list(skill_ids)
+        patterns.extend(title.lower() for title in titles if title.lower() not in skill_ids)
+        matcher = SkillMatcher(patterns)
+
+        metadata = {
+            "catalog_version": catalog_version(catalog),
+            "source_sha256": source_sha256,
+            "titles": titles,
+            "patterns": matcher.patterns,
+            "skill_count": len(skill_ids),
+            "skill_labels": [catalog["skill_labels"][skill] for skill in skill_ids],
+            "missing_skills_mapping": catalog["missing_skills_mapping"],
+            "company_mapping": catalog["company_mapping"],
+        }
+        return cls(metadata, matcher, job_skill_ids, skill_jobs)
+
+    @classmethod
+    def from_source(cls, path):
+        """Compile a catalog source in memory, returns (catalog, warnings)"""
+        source, source_sha256 = read_source(path)
+        catalog, warnings = normalize_catalog(source)
+        return cls.from_catalog(catalog, source_sha256), warnings
+
+    def save(self, path):
+        """Write the catalog, matcher tables and postings as a memory-mappable artifact"""
+        import numpy as np
+
+        goto, fail, out = self.matcher.tables()
+        arrays = {
+            "goto_offsets": np.cumsum([0] + [len(edges) for edges in goto], dtype=np.int64),
+            "goto_chars": np.array([ord(ch) for edges in goto for ch in edges], dtype="<u4"),
+            "goto_targets": np.array([state for edges in goto for state in edges.values()], dtype=np.int32),
+            "fail": np.array(fail, dtype=np.int32),
+            "out_offsets": np.cumsum([0] + [len(ids) for ids in out], dtype=np.int64),
+            "out_ids": np.array([i for ids in out for i in ids], dtype=np.int32),
+            "job_skill_offsets": np.cumsum([0] + [len(ids) for ids in self.job_skill_ids], dtype=np.int64),
+            "job_skill_ids": np.array([i for ids in self.job_skill_ids for i in ids], dtype=np.int32),
+            "skill_job_offsets": np.cumsum([0] + [len(jobs) for jobs in self.skill_jobs], dtype=np.int64),
+            "skill_jobs": np.array([j for jobs in self.skill_jobs for j in jobs], dtype=np.int32),
+        }
+        write_artifact(path, "skill_catalog", arrays, self.metadata)
+
+    @classmethod
+    def load(cls, path, verify=True):
+        """Load a compiled catalog artifact without rebuilding the matcher"""
+        artifact = Artifact(path, kind="skill_catalog", verify=verify)
+
+        def ragged(offsets_name, values, container=list):
+            # One iterator over the flat values, cut into runs by the offsets
+            offsets = artifact.values(offsets_name).tolist()
+            values = iter(values)
+            return [container(islice(values, stop - start)) for start, stop in zip(offsets, offsets[1:])]
+
+        chars = artifact.values("goto_chars").tobytes().decode("utf-32-le")
+        goto = ragged("goto_offsets", zip(chars, artifact.values("goto_targets").tolist()), dict)
+        matcher = SkillMatcher.from_tables(artifact.metadata["patterns"], goto, artifact.values("fail").tolist(),
+                                           ragged("out_offsets", artifact.values("out_ids").tolist(), tuple))
+        return cls(artifact.metadata, matcher,
+                   ragged("job_skill_offsets", artifact.values("job_skill_ids").tolist()),
+                   ragged("skill_job_offsets", artifact.values("skill_jobs").tolist()))
+
+
+def _file_sha256(path):
+    """SHA-256 of a file's bytes"""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_catalog(compiled_path=COMPILED_CATALOG_PATH, source_path=CATALOG_SOURCE_PATH):
+    """Load the compiled catalog, compiling the source in memory when the artifact is missing or stale"""
+    source_exists = bool(source_path) and os.path.exists(source_path)
+    if os.path.exists(compiled_path):
+        try:
+            catalog = CompiledCatalog.load(compiled_path)
+            if not source_exists or catalog.source_sha256 == _file_sha256(source_path):
+                print(f"Job catalog {catalog.catalog_version} loaded from {compiled_path}")
+                return catalog
+            print(f"Warning: {source_path} changed since {compiled_path} was compiled")
+        except ArtifactError as e:
+            print(f"Error with compiled job catalog: {e}")
+    if not source_exists:
+        raise CatalogError(f"No job catalog found at {compiled_path} or {source_path}")
+
+    catalog, warnings = CompiledCatalog.from_source(source_path)
+    for warning in warnings:
+        print(f"Catalog warning: {warning}")
+    print(f"Job catalog {catalog.catalog_version} compiled in memory from {source_path}; "
+          f"run 'python catalog.py compile' to skip this at startup")
+    return catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate and compile the job catalog")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = commands.add_parser("compile", help="compile a JSON or YAML catalog into an artifact")
+    compile_parser.add_argument("source", nargs="?", default=CATALOG_SOURCE_PATH)
+    compile_parser.add_argument("-o", "--output", default=COMPILED_CATALOG_PATH)
+    compile_parser.add_argument("--strict", action="store_true", help="fail if there are any warnings")
+
+    check_parser = commands.add_parser("check", help="validate a catalog source and list its warnings")
+    check_parser.add_argument("source", nargs="?", default=CATALOG_SOURCE_PATH)
+
+    args = parser.parse_args()
+    try:
+        catalog, warnings = CompiledCatalog.from_source(args.source)
+    except (OSError, CatalogError) as e:
+        print(f"Error: {e}")
+        return 1
+    for warning in warnings:
+        print(f"Warning: {warning}")
+    print(f"{len(catalog.titles)} jobs, {catalog.skill_count} skills, {len(warnings)} warnings, "
+          f"version {catalog.catalog_version}")
+
+    if args.command == "check":
+        return 0
+    if args.strict and warnings:
+        print("Not compiled: --strict does not allow warnings")
+        return 1
+    catalog.save(args.output)
+    print(f"Compiled catalog written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
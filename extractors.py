@@ -0,0 +1,509 @@
+import codecs
+import io
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+# The PDF backends (pdf_backends, pdfminer, pdfplumber) are imported on first use to keep startup fast
+
+# Bump whenever extraction output changes so cached text is re-parsed
+EXTRACTOR_VERSION = "4"
+
+# Leading bytes read to recognize a file's format
+SNIFF_BYTES = 2048
+
+# Below this many non-blank characters per page the fast PDF backend is
+# assumed to have misread the document and pdfplumber gets a try
+PDF_MIN_CHARS_PER_PAGE = 50
+
+# Bytes read at a time when a large plain text resume is streamed
+TEXT_CHUNK_BYTES = 1024 * 1024
+
+# Control bytes that never appear in a plain text resume
+_BINARY_BYTES = re.compile(rb"[\x00-\x08\x0e-\x1f]")
+
+# WordprocessingML and markup-compatibility namespaces, in ElementTree's {uri}tag form
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+_DOCX_HEADER_PART = re.compile(r"word/header(\d*)\.xml$")
+_DOCX_FOOTER_PART = re.compile(r"word/footer(\d*)\.xml$")
+
+
+def _file_extension(filename):
+    """Lowercased extension of a resume file name, including the dot"""
+    return os.path.splitext(filename or "")[1].lower()
+
+
+def mismatched_extension(filename, file_format):
+    """The file name's extension when it disagrees with the sniffed format, else None"""
+    extension = _file_extension(filename)
+    return extension if extension and extension != "." + file_format else None
+
+
+def source_name(source):
+    """Best-effort file name of a path or uploaded stream"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, "filename", None) or getattr(source, "name", None) or ""
+
+
+def source_size(source):
+    """Size in bytes of a path, bytes or seekable stream, leaving the stream where it was"""
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    stream = getattr(source, "stream", source)
+    position = stream.tell()
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(position)
+    return size
+
+
+# Seconds past the deadline to wait for running page ranges to return the pages they finished
+PAGE_RANGE_GRACE = 0.25
+
+# Process pool for page-level PDF extraction, created on first use
+_page_pool = None
+_page_pool_workers = 0
+_page_pool_lock = threading.Lock()
+
+
+def _get_page_pool(workers):
+    """Return the shared page extraction pool, resized if the worker count changed"""
+    global _page_pool, _page_pool_workers
+    with _page_pool_lock:
+        if _page_pool is None or _page_pool_workers != workers:
+            if _page_pool is not None:
+                # Ranges already handed to the old pool finish, then its workers exit
+                _page_pool.close()
+            _page_pool = multiprocessing.Pool(processes=workers)
+            _page_pool_workers = workers
+        return _page_pool
+
+
+def _discard_page_pool(pool):
+    """Kill a pool whose workers are still parsing past a deadline; the next request starts a fresh one
+    
+    A page already being parsed cannot be interrupted any other way, and
+    left running it would hold a worker that later requests queue behind.
+    """
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is pool:
+            _page_pool = None
+    pool.terminate()
+
+
+def _caused_by_memory_error(error):
+    """True when a parser wrapped a MemoryError in its own exception type"""
+    return isinstance(error.__cause__, MemoryError) or any(isinstance(arg, MemoryError) for arg in error.args)
+
+
+def _extract_pdf_page_range(pdf_source, start, stop, backend, deadline=None):
+    """Pool worker: extract pages [start, stop) of a PDF given as bytes or a path
+    
+    Stops between pages once time.monotonic() passes deadline (the clock is
+    system-wide, so the parent's deadline holds here) and returns the pages
+    that finished.
+    """
+    from pdf_backends import PDF_BACKENDS
+    # A range that only got a worker after the deadline skips parsing the document
+    if deadline is not None and time.monotonic() >= deadline:
+        return []
+    stream = io.BytesIO(pdf_source) if isinstance(pdf_source, bytes) else pdf_source
+    page_texts = []
+    with PDF_BACKENDS[backend](stream) as pdf:
+        for page_number in range(start, stop):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            page_texts.append(pdf.page_text(page_number))
+    return page_texts
+
+
+def _extract_pages_parallel(pdf_source, page_count, deadline, workers, pages_per_task, backend):
+    """Fan page ranges out to the pool and keep whatever finishes before the deadline"""
+    pool = _get_page_pool(workers)
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+    results = [pool.apply_async(_extract_pdf_page_range, (pdf_source, start, stop, backend, deadline))
+               for start, stop in ranges]
+    # Ranges still queued at the deadline return at once; running ones stop at their next page
+    for result in results:
+        result.wait(None if deadline is None else max(0, deadline - time.monotonic()))
+    if not all(result.ready() for result in results):
+        # Give them a moment to return the pages they finished, then kill the pool
+        # rather than let a long page keep a worker busy after this request is answered
+        grace_end = time.monotonic() + PAGE_RANGE_GRACE
+        for result in results:
+            result.wait(max(0, grace_end - time.monotonic()))
+        unfinished = sum(not result.ready() for result in results)
+        if unfinished:
+            print(f"Warning: recycling the PDF page pool, {unfinished} page ranges were unfinished at the deadline")
+            _discard_page_pool(pool)
+
+    page_texts = []
+    complete = True
+    for result, (start, stop) in zip(results, ranges):
+        if not result.ready():
+            complete = False
+            continue
+        try:
+            range_texts = result.get()
+        except Exception as e:
+            print(f"Warning: PDF page range failed: {e}")
+            complete = False
+            continue
+        page_texts.extend(range_texts)
+        complete = complete and len(range_texts) == stop - start
+    return page_texts, complete
+
+
+def extract_pdf_text(source, max_pages=None, time_budget=None, page_workers=0, pages_per_task=4,
+                     backend="pdfminer"):
+    """Extract PDF text with one of pdf_backends.PDF_BACKENDS within optional page and wall-clock budgets.
+
+    With page_workers > 0, page ranges are extracted on a process pool. Returns
+    (text, metadata); metadata["truncated"] is True when a budget cut the
+    document short, in which case text holds the pages that finished in time.
+    """
+    from pdf_backends import PDF_BACKENDS
+    deadline = time.monotonic() + time_budget if time_budget else None
+
+    if page_workers:
+        # Workers reopen the document themselves, so ship a path or the raw bytes
+        if isinstance(source, (str, os.PathLike)):
+            pdf_source = stream = os.fspath(source)
+        else:
+            source.seek(0)
+            pdf_source = source.read()
+            stream = io.BytesIO(pdf_source)
+    else:
+        pdf_source = stream = source
+
+    with PDF_BACKENDS[backend](stream) as pdf:
+        total_pages = len(pdf.pages)
+        page_limit = min(total_pages, max_pages) if max_pages else total_pages
+
+        if page_workers and page_limit > pages_per_task:
+            page_texts, complete = _extract_pages_parallel(
+                pdf_source, page_limit, deadline, page_workers, pages_per_task, backend)
+        else:
+            page_texts = []
+            complete = True
+            for page_number in range(page_limit):
+                if deadline is not None and time.monotonic() >= deadline:
+                    complete = False
+                    break
+                page_texts.append(pdf.page_text(page_number))
+
+    metadata = {
+        "format": "pdf",
+        "backend": backend,
+        "pages": total_pages,
+        "pages_extracted": len(page_texts),
+        "truncated": not complete or page_limit < total_pages,
+    }
+    return "\n".join(page_texts), metadata
+
+
+def extract_pdf(source, max_pages=None, time_budget=None, page_workers=0):
+    """Extract PDF text with the fast pdfminer backend, falling back to pdfplumber.
+
+    pdfplumber runs only when the fast path fails or finds fewer than
+    PDF_MIN_CHARS_PER_PAGE characters per page, and its text is kept if it
+    found more. metadata["backend"] names the backend whose text is
+    returned and metadata["fallback"] says why pdfplumber was tried.
+    """
+    deadline = time.monotonic() + time_budget if time_budget else None
+    try:
+        text, metadata = extract_pdf_text(source, max_pages=max_pages, time_budget=time_budget,
+                                          page_workers=page_workers, backend="pdfminer")
+        found = len("".join(text.split()))
+        fallback = None if found >= PDF_MIN_CHARS_PER_PAGE * max(1, metadata["pages_extracted"]) else "little text"
+    except MemoryError:
+        raise
+    except Exception as e:
+        if _caused_by_memory_error(e):
+            raise MemoryError(str(e)) from e
+        print(f"Warning: fast PDF extraction failed, retrying with pdfplumber: {e}")
+        text, metadata, found, fallback = "", None, 0, "error"
+
+    if fallback is not None:
+        # The fallback only gets what is left of the time budget
+        remaining = max(deadline - time.monotonic(), 1e-6) if deadline is not None else None
+        fallback_text, fallback_metadata = extract_pdf_text(source, max_pages=max_pages, time_budget=remaining,
+                                                            page_workers=page_workers, backend="pdfplumber")
+        if metadata is None or len("".join(fallback_text.split())) > found:
+            text, metadata = fallback_text, fallback_metadata
+        metadata["fallback"] = fallback
+
+    if not text.strip():
+        print("Warning: PDF text extraction returned empty content")
+    if metadata["truncated"]:
+        print(f"Warning: PDF truncated after {metadata['pages_extracted']} of {metadata['pages']} pages")
+    return text, metadata
+
+
+def _docx_part_lines(part):
+    """Stream one WordprocessingML part and return its text lines in document order
+    
+    Paragraphs become lines, table rows become tab-separated lines and text
+    boxes are read where they are anchored. Paragraphs and tables are
+    dropped from the tree as soon as they are read, so memory does not grow
+    with the size of the part.
+    """
+    lines = []
+    open_elements = []
+    sinks = [lines]  # where finished paragraphs go: the output or the current table cell
+    rows = []  # cells of the table rows being read, innermost last
+    runs = []  # text pieces of the paragraphs being read, innermost last
+    fallback_depth = 0  # inside mc:Fallback, which repeats its mc:Choice in older markup
+    
+    for event, element in iterparse(part, events=("start", "end")):
+        tag = element.tag
+        if event == "start":
+            open_elements.append(element)
+            if tag == _W + "p":
+                runs.append([])
+            elif tag == _W + "tc":
+                sinks.append([])
+            elif tag == _W + "tr":
+                rows.append([])
+            elif tag == _MC + "Fallback":
+                fallback_depth += 1
+            continue
+        
+        open_elements.pop()
+        if tag in (_W + "p", _W + "tbl") and open_elements:
+            # Everything inside has been read; detach it so the tree stays small
+            open_elements[-1].remove(element)
+        
+        if tag == _MC + "Fallback":
+            fallback_depth -= 1
+        elif tag == _W + "p":
+            text = "".join(runs.pop())
+            if text.strip() and not fallback_depth:
+                sinks[-1].append(text)
+        elif tag == _W + "tc":
+            cell = sinks.pop()
+            if rows and not fallback_depth:
+                rows[-1].append(" ".join(cell))
+        elif tag == _W + "tr":
+            cells = [cell for cell in rows.pop() if cell.strip()]
+            if cells and not fallback_depth:
+                sinks[-1].append("\t".join(cells))
+        elif fallback_depth or not runs:
+            # Text repeated in a fallback, or outside any paragraph, is not content
+            continue
+        elif tag == _W + "t":
+            runs[-1].append(element.text or "")
+        elif tag == _W + "tab":
+            # w:tab also defines tab stops in w:pPr/w:tabs; only a tab in a run is text
+            if open_elements and open_elements[-1].tag == _W + "r":
+                runs[-1].append("\t")
+        elif tag in (_W + "br", _W + "cr"):
+            runs[-1].append("\n")
+        elif tag == _W + "noBreakHyphen":
+            runs[-1].append("-")
+    return lines
+
+
+def _docx_part_order(name, pattern):
+    """Sort key for numbered header or footer parts: header.xml, header1.xml, header2.xml, ..."""
+    number = pattern.match(name).group(1)
+    return int(number) if number else 0
+
+
+def extract_docx_text(source):
+    """Extract DOCX text by streaming the XML parts out of the zip, without python-docx.
+    
+    Returns (text, metadata). Header text comes first, then the body
+    (paragraphs, tables and text boxes in document order), then footers.
+    Headers and footers repeated across sections are kept once.
+    """
+    with zipfile.ZipFile(source) as archive:
+        names = archive.namelist()
+        if "word/document.xml" not in names:
+            raise ValueError("zip archive is not a DOCX document")
+        headers = sorted((name for name in names if _DOCX_HEADER_PART.match(name)),
+                         key=lambda name: _docx_part_order(name, _DOCX_HEADER_PART))
+        footers = sorted((name for name in names if _DOCX_FOOTER_PART.match(name)),
+                         key=lambda name: _docx_part_order(name, _DOCX_FOOTER_PART))
+        
+        lines = []
+        seen = set()
+        for name in headers + ["word/document.xml"] + footers:
+            with archive.open(name) as part:
+                part_lines = _docx_part_lines(part)
+            if name != "word/document.xml":
+                key = tuple(part_lines)
+                if key in seen:
+                    continue
+                seen.add(key)
+            lines.extend(part_lines)
+    
+    metadata = {"format": "docx", "truncated": False, "parts": 1 + len(headers) + len(footers)}
+    return "\n".join(lines), metadata
+
+
+def _extract_docx(stream, **budgets):
+    """Registry adapter for extract_docx_text; the page and time budgets are PDF only"""
+    return extract_docx_text(stream)
+
+
+def _extract_txt(stream, **budgets):
+    """Decode a plain text resume, skipping bytes that are not UTF-8"""
+    if isinstance(stream, io.BytesIO):
+        text = stream.getvalue().decode("utf-8", errors="ignore")
+    elif hasattr(stream, "read"):
+        text = stream.read().decode("utf-8", errors="ignore")
+    else:
+        with open(stream, 'r', encoding='utf-8', errors='ignore') as f:
+            text = f.read()
+    return text, {"format": "txt", "truncated": False}
+
+
+def iter_text_chunks(source, chunk_size=TEXT_CHUNK_BYTES):
+    """Decode a plain text resume path, bytes or stream chunk_size bytes at a time
+    
+    Yields str chunks; a UTF-8 sequence split between two reads is decoded
+    whole, and bytes that are not UTF-8 are skipped as in _extract_txt.
+    Streams are read from where they are and rewound afterwards.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from _decode_chunks(f, decoder, chunk_size)
+        return
+    stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else getattr(source, "stream", source)
+    position = stream.tell()
+    try:
+        yield from _decode_chunks(stream, decoder, chunk_size)
+    finally:
+        stream.seek(position)
+
+
+def _decode_chunks(stream, decoder, chunk_size):
+    """Non-empty decoded text of each chunk_size read from stream"""
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def _looks_like_pdf(head):
+    # Readers accept the header anywhere in the first kilobyte
+    return b"%PDF-" in head[:1024]
+
+
+def _looks_like_docx(head):
+    # DOCX is a zip archive; extract_docx_text rejects zips without a document part
+    return head.startswith(b"PK\x03\x04")
+
+
+def _looks_like_text(head):
+    return not _BINARY_BYTES.search(head)
+
+
+# (format, sniff, extract) in the order they are tried. sniff(head) looks at
+# the first SNIFF_BYTES bytes; extract(stream, max_pages=, time_budget=,
+# page_workers=) returns (text, metadata). Plain text has no signature, so
+# it is the catch-all and stays last.
+EXTRACTORS = [
+    ("pdf", _looks_like_pdf, extract_pdf),
+    ("docx", _looks_like_docx, _extract_docx),
+    ("txt", _looks_like_text, _extract_txt),
+]
+
+
+def register_extractor(file_format, sniff, extract):
+    """Add an extractor for a new format; it is tried before the built-in ones"""
+    EXTRACTORS.insert(0, (file_format, sniff, extract))
+
+
+def _read_head(stream):
+    """First SNIFF_BYTES bytes of a path or seekable stream, leaving the stream where it was"""
+    if isinstance(stream, (str, os.PathLike)):
+        with open(stream, "rb") as f:
+            return f.read(SNIFF_BYTES)
+    position = stream.tell()
+    head = stream.read(SNIFF_BYTES)
+    stream.seek(position)
+    return head
+
+
+def _find_extractor(head):
+    """(format, extract) of the first registered extractor that recognizes head, or (None, None)"""
+    for file_format, sniff, extract in EXTRACTORS:
+        if sniff(head):
+            return file_format, extract
+    return None, None
+
+
+def sniff_format(source):
+    """Format name of a resume path, bytes or stream judged by its content, or None if unsupported"""
+    if isinstance(source, (bytes, bytearray)):
+        head = bytes(source[:SNIFF_BYTES])
+    else:
+        head = _read_head(getattr(source, "stream", source))
+    return _find_extractor(head)[0]
+
+
+def extract_resume(source, filename=None, max_pages=None, time_budget=None, page_workers=0):
+    """Extract text from a PDF, DOCX or TXT resume given as a path, bytes or file-like object.
+
+    The format is recognized from the leading bytes (see EXTRACTORS), not
+    the file name, which is only used for logging. The budgets only apply
+    to PDFs (see extract_pdf). Returns (text, metadata); metadata["format"]
+    records the extractor that ran. This is a module-level function so it
+    can be shipped to a process pool.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        filename = filename or "<upload>"
+        stream = io.BytesIO(source)
+    elif isinstance(source, (str, os.PathLike)):
+        filename = filename or os.fspath(source)
+        stream = os.fspath(source)
+        if not os.path.exists(source):
+            print(f"Resume file not found: {source}")
+            return "", {"error": "file not found"}
+    else:
+        filename = filename or source_name(source) or "<upload>"
+        # Werkzeug's FileStorage wraps the spooled body in .stream
+        stream = getattr(source, "stream", source)
+
+    try:
+        file_format, extract = _find_extractor(_read_head(stream))
+        if file_format is None:
+            print(f"Unsupported file format: {filename}. Only PDF, DOCX and text files are supported.")
+            return "", {"error": "unsupported format"}
+
+        print(f"Extracting text from {file_format.upper()}: {filename}")
+        text, metadata = extract(stream, max_pages=max_pages, time_budget=time_budget, page_workers=page_workers)
+        extension = mismatched_extension(filename, file_format)
+        if extension:
+            # The content decides; the name the client sent is only reported
+            print(f"Warning: {filename} is a {file_format.upper()} file despite its extension")
+            metadata["declared_extension"] = extension
+        return text, metadata
+    except MemoryError:
+        # Let the extraction sandbox see memory limit breaches
+        raise
+    except Exception as e:
+        # pdfplumber wraps parser errors, including MemoryError, in PdfminerException
+        if _caused_by_memory_error(e):
+            raise MemoryError(str(e)) from e
+        print(f"Error extracting text from {filename}: {e}")
+        return "", {"error": str(e)}
+
+
+def extract_text(source, filename=None):
+    """Extract text from a PDF, DOCX or TXT resume given as a path, bytes or file-like object."""
+    return extract_resume(source, filename)[0]
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+
+# Upstream answers worth another attempt
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _normalize(value):
+    """Collapse whitespace in every string so cosmetic differences share a cache key"""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def payload_cache_key(payload):
+    """SHA-256 of the normalized request payload"""
+    encoded = json.dumps(_normalize(payload), sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class GeminiError(Exception):
+    """Raised when the Gemini API cannot produce a usable response"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CircuitBreaker:
+    """Skips upstream calls after repeated failures, then probes with a single trial call.
+
+    closed: calls go through. open: calls are skipped until reset_timeout has
+    passed. half-open: one trial call decides whether to close or re-open.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.skipped = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go upstream now"""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+                self._trial_in_flight = False
+            if self.state == "closed":
+                return True
+            if self.state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.skipped += 1
+            return False
+
+    def cancel_trial(self):
+        """A call let through by allow() never went upstream: free the half-open trial for another caller"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        """A call succeeded: close the breaker"""
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """A call failed: open the breaker after too many failures or a failed trial"""
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == "half-open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        """Counters for monitoring the breaker"""
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.times_opened,
+                "skipped": self.skipped,
+            }
+
+
+class GeminiClient:
+    """Gemini API client with a keep-alive connection pool, timeouts and bounded retries.
+
+    api_url can point at a local stub server for testing.
+    """
+
+    def __init__(self, api_url=DEFAULT_GEMINI_API_URL, api_key=None, connect_timeout=3.05, read_timeout=20,
+                 max_retries=2, backoff_base=0.25, backoff_max=4.0, max_concurrency=8, pool_size=None):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+
+        # One session reuses TCP+TLS connections across requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size or max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Callers past the limit wait instead of opening more upstream requests
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._acquire_timeout = connect_timeout + read_timeout
+        self._stats_lock = threading.Lock()
+        self.requests_sent = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, honouring Retry-After up to backoff_max"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after:
+            try:
+                delay = max(delay, min(self.backoff_max, float(retry_after)))
+            except ValueError:
+                pass
+        time.sleep(delay)
+
+    def _count(self, counter):
+        """Increment one of the stats counters"""
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def generate(self, payload):
+        """POST payload to the Gemini API and return the decoded JSON response"""
+        if not self._slots.acquire(timeout=self._acquire_timeout):
+            self._count("failures")
+            raise GeminiError("Too many concurrent Gemini requests")
+        try:
+            params = {"key": self.api_key} if self.api_key else None
+            last_error = None
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    self._count("retries")
+                self._count("requests_sent")
+                retry_after = None
+                try:
+                    response = self.session.post(self.api_url, params=params, json=payload, timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    last_error = GeminiError(f"Gemini API request failed: {e}")
+                else:
+                    if response.status_code == 200:
+                        try:
+                            return response.json()
+                        except ValueError as e:
+                            self._count("failures")
+                            raise GeminiError(f"Invalid JSON from Gemini API: {e}", 200)
+                    last_error = GeminiError(f"Gemini API returned status {response.status_code}",
+                                             response.status_code)
+                    if response.status_code not in RETRYABLE_STATUS_CODES:
+                        break
+                    retry_after = response.headers.get("Retry-After")
+
+                if attempt < self.max_retries:
+                    self._backoff(attempt, retry_after)
+
+            self._count("failures")
+            raise last_error
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        """Counters for monitoring the client"""
+        with self._stats_lock:
+            return {
+                "requests_sent": self.requests_sent,
+                "retries": self.retries,
+                "failures": self.failures,
+                "max_concurrency": self.max_concurrency,
+            }
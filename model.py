@@ -1,80 +1,272 @@
 import os
-import numpy as np
 import pickle
 import json
-import pdfplumber
-import docx
-from flask import Flask, request, jsonify
+import tempfile
+import threading
+import time
+import hmac
+from functools import partial, wraps
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from flask import Flask, Request, request, jsonify
 from flask_cors import CORS
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.ensemble import RandomForestClassifier
-import re
+from werkzeug.exceptions import RequestEntityTooLarge
+from catalog import load_catalog
+from similarity import JobProfileSimilarity, HASHING_CHUNK_SIZE
+from resume_document import ResumeDocument
+from extractors import (extract_resume, source_name, source_size, sniff_format, iter_text_chunks,
+                        mismatched_extension, EXTRACTOR_VERSION)
+from caches import RecommendationCache, ExtractedTextCache, content_hash
+from sandbox import SandboxedExtractor, ExtractionRejected
+from admission import AdmissionController, AdmissionRejected
+
+class CatalogIndex:
+    """Skill matcher, title postings and score matrix for one version of the job catalog
+    
+    An index is never modified after it is built. Catalog reloads build a new
+    one and swap it in, so a request that took a reference keeps a consistent
+    view for its whole lifetime.
+    """
+    # Score added by each catalog skill found in the resume, and by a job title mention
+    SKILL_WEIGHT = 0.5
+    TITLE_WEIGHT = 5
+    # Reloads that change at most this fraction of jobs patch the previous index
+    INCREMENTAL_FRACTION = 0.25
+
+    def __init__(self, catalog, previous=None, hashing=False):
+        self.catalog = catalog
+        self.hashing = hashing
+        self.catalog_version = catalog.catalog_version
+        self.job_skills = catalog.job_skills
+        self.missing_skills_mapping = catalog.missing_skills_mapping
+        self.company_mapping = catalog.company_mapping
+        self.skill_matcher = catalog.matcher
+        self.job_index_titles = list(catalog.titles)
+        self._job_skill_matrix = None
+        self._similarity = None
+        self._matrix_lock = threading.Lock()
+        
+        # Skill ids index these lists: the normalized skill, its display spelling
+        # and whether it is a multi-word phrase (substring match) or a single
+        # word (word-boundary match)
+        self.skill_count = catalog.skill_count
+        self.skill_patterns = catalog.patterns[:catalog.skill_count]
+        self.skill_labels = catalog.skill_labels
+        self.skill_is_phrase = [len(label.split()) > 1 for label in catalog.skill_labels]
+        
+        # None when everything was indexed from scratch
+        self.changed_jobs = self._changed_jobs(previous)
+        if self.changed_jobs is None:
+            self._build_skill_index()
+        else:
+            self._patch_skill_index(previous)
+
+    def _changed_jobs(self, previous):
+        """Titles whose skills differ from previous, or None when a full rebuild is needed"""
+        if previous is None or previous.job_index_titles != self.job_index_titles:
+            return None
+        changed = [job_title for job_title in self.job_index_titles
+                   if previous.job_skills[job_title] != self.job_skills[job_title]]
+        if len(changed) > max(1, int(len(self.job_index_titles) * self.INCREMENTAL_FRACTION)):
+            return None
+        return changed
+
+    def _build_skill_index(self):
+        """Index job positions, skill sets, title postings and score matrix columns"""
+        catalog = self.catalog
+        self.job_positions = {job_title: i for i, job_title in enumerate(catalog.titles)}
+        self.job_skill_sets = {job_title: set(skills) for job_title, skills in catalog.job_skills.items()}
+        
+        self.title_postings = {}
+        for job_title in catalog.titles:
+            self.title_postings.setdefault(job_title.lower(), []).append((job_title, self.TITLE_WEIGHT))
+        
+        self.skill_columns = {pattern: i for i, pattern in enumerate(catalog.patterns)}
+
+    def _patch_skill_index(self, previous):
+        """Reuse the previous index and only re-index the changed jobs"""
+        catalog = self.catalog
+        # Same titles in the same order, so positions and title postings carry over
+        self.job_positions = previous.job_positions
+        self.title_postings = previous.title_postings
+        self.job_skill_sets = dict(previous.job_skill_sets)
+        for job_title in self.changed_jobs:
+            self.job_skill_sets[job_title] = set(self.job_skills[job_title])
+        
+        # Score matrix columns only carry over when the pattern list is unchanged
+        if catalog.patterns != previous.catalog.patterns:
+            self.skill_columns = {pattern: i for i, pattern in enumerate(catalog.patterns)}
+            return
+        self.skill_columns = previous.skill_columns
+        if previous._job_skill_matrix is not None:
+            if self.changed_jobs:
+                self._job_skill_matrix = self._replace_rows(
+                    previous._job_skill_matrix, [self.job_positions[job_title] for job_title in self.changed_jobs])
+            else:
+                self._job_skill_matrix = previous._job_skill_matrix
+
+    def _score_rows(self, positions):
+        """Sparse rows of the job-by-skill weight matrix for the jobs at positions"""
+        import numpy as np
+        from scipy import sparse
+        
+        # Columns [0, P) weight a pattern found anywhere in the resume (skill
+        # boost or job title mention), columns [P, 2P) count extracted skills
+        num_patterns = len(self.skill_columns)
+        
+        rows, cols, weights = [], [], []
+        for row, position in enumerate(positions):
+            job_title = self.job_index_titles[position]
+            for skill in self.job_skills[job_title]:
+                column = self.skill_columns[skill]
+                rows.extend((row, row))
+                cols.extend((column, num_patterns + column))
+                weights.extend((self.SKILL_WEIGHT, 1))
+            rows.append(row)
+            cols.append(self.skill_columns[job_title.lower()])
+            weights.append(self.TITLE_WEIGHT)
+        
+        # Duplicate (job, column) entries, e.g. "chef" as skill and title, are summed
+        return sparse.csr_matrix(
+            (np.array(weights, dtype=np.float64), (rows, cols)),
+            shape=(len(positions), 2 * num_patterns))
+
+    def _replace_rows(self, matrix, positions):
+        """Copy of a score matrix with the rows at positions rebuilt from this catalog"""
+        import numpy as np
+        from scipy import sparse
+        
+        keep = np.ones(matrix.shape[0], dtype=bool)
+        keep[positions] = False
+        old = matrix.tocoo()
+        new = self._score_rows(positions).tocoo()
+        kept = keep[old.row]
+        rows = np.concatenate((old.row[kept], np.asarray(positions)[new.row]))
+        cols = np.concatenate((old.col[kept], new.col))
+        weights = np.concatenate((old.data[kept], new.data))
+        return sparse.csr_matrix((weights, (rows, cols)), shape=matrix.shape)
+
+    def resume_skill_ids(self, matches):
+        """Ids of the catalog skills among a resume's matches, in catalog order"""
+        skill_ids = []
+        for pattern in matches.found:
+            skill_id = self.skill_matcher.pattern_id(pattern)
+            # Multi-word skills match anywhere, single-word skills only on word boundaries
+            if skill_id < self.skill_count and (self.skill_is_phrase[skill_id] or pattern in matches.bounded):
+                skill_ids.append(skill_id)
+        skill_ids.sort()
+        return skill_ids
+
+    @property
+    def job_skill_matrix(self):
+        """Sparse job-by-skill weight matrix, built on first use"""
+        if self._job_skill_matrix is None:
+            with self._matrix_lock:
+                if self._job_skill_matrix is None:
+                    self._job_skill_matrix = self._score_rows(range(len(self.job_index_titles)))
+        return self._job_skill_matrix
+
+    @property
+    def similarity(self):
+        """TF-IDF engine fit on this catalog's job profiles, built on first use"""
+        if self._similarity is None:
+            with self._matrix_lock:
+                if self._similarity is None:
+                    self._similarity = JobProfileSimilarity(
+                        self.job_index_titles, self.job_skills, self.missing_skills_mapping, hashing=self.hashing)
+        return self._similarity
+
+# Ranking methods a request can pick, and the label reported in its results
+RANKING_METHODS = {
+    "keyword": "improved-keyword-based",
+    "tfidf": "tfidf-cosine",
+    "hybrid": "hybrid-keyword-tfidf-model",
+}
+
+# Share of each part in the hybrid score; every part is scaled to [0, 1] first.
+# "model" is the RandomForest probability of the job, dropped when the model
+# cannot score the vectorizer's features
+DEFAULT_HYBRID_WEIGHTS = {"keyword": 0.4, "tfidf": 0.4, "model": 0.2}
+
+# How the TF-IDF engine turns text into features: a fitted vocabulary, or
+# hashed terms plus an idf array, which needs no vocabulary in any worker
+FEATURIZATION_MODES = ("vocabulary", "hashing")
+
+# Resumes per predict_proba call when the model scores a batch
+MODEL_BATCH_SIZE = 256
+
+# Keyword scores are read against at least this ceiling when turned into confidences
+KEYWORD_SCORE_CEILING = 20
+
+# Plain text resumes larger than this are matched chunk by chunk instead of read whole
+STREAM_TEXT_BYTES = 1024 * 1024
 
 class JobRecommendationSystem:
     def __init__(self, model_path="job_recommendation_model.pkl", vectorizer_path="vectorizer.pkl", 
-                 job_mapping_path="job_titles.json"):
-        """Initialize the Job Recommendation System."""
+                 job_mapping_path="job_titles.json", extraction_workers=None,
+                 result_cache_bytes=64 * 1024 * 1024, result_cache_ttl=3600,
+                 text_cache_path="extracted_text_cache.sqlite3",
+                 pdf_max_pages=None, pdf_time_budget=None, pdf_page_workers=0,
+                 sandbox=None, fast_start=False,
+                 model_artifact_path="job_recommendation_model.artifact",
+                 vectorizer_artifact_path="vectorizer.artifact",
+                 catalog_path="job_catalog.json", compiled_catalog_path="job_catalog.artifact",
+                 hybrid_weights=None, model_n_jobs=None, model_batch_size=MODEL_BATCH_SIZE,
+                 featurization="vocabulary", stream_text_bytes=STREAM_TEXT_BYTES):
+        """Initialize the Job Recommendation System.
+        
+        With fast_start the model, vectorizer and score matrix are built on
+        first use, and nothing is trained or written to disk during startup.
+        """
         self.use_fallback = False
+        self.fast_start = fast_start
+        if featurization not in FEATURIZATION_MODES:
+            raise ValueError(f"featurization must be one of: {', '.join(FEATURIZATION_MODES)}")
+        self.featurization = featurization
+        self.hybrid_weights = dict(hybrid_weights or DEFAULT_HYBRID_WEIGHTS)
+        # Threads for model scoring; a batch is split into chunks of model_batch_size
+        self.model_n_jobs = model_n_jobs or min(4, os.cpu_count() or 1)
+        self.model_batch_size = model_batch_size
+        self._model_pool = None
+        self._model_columns = None  # (catalog_version, job column of each model class)
+        self._model_unusable = None  # reason the model cannot score, once known
+        self._timing_lock = threading.Lock()
+        self.stage_totals = {}  # stage -> (calls, seconds)
         
-        # Try to load the model
-        try:
-            if os.path.exists(model_path):
-                with open(model_path, 'rb') as f:
-                    self.model = pickle.load(f)
-                print(f"Model loaded successfully from {model_path}")
-            else:
-                print(f"Model file not found: {model_path}. Creating new model.")
-                self.model = self._create_default_model()
-                # Save the new model
-                with open(model_path, 'wb') as f:
-                    pickle.dump(self.model, f)
-                print(f"New model created and saved to {model_path}")
-        except Exception as e:
-            print(f"Error with model: {e}")
-            print("Creating new model instead...")
-            self.model = self._create_default_model()
-            # Try to save the new model
-            try:
-                with open(model_path, 'wb') as f:
-                    pickle.dump(self.model, f)
-                print(f"New model saved to {model_path}")
-            except Exception as save_e:
-                print(f"Couldn't save new model: {save_e}")
-
-        # Try to load the vectorizer
-        try:
-            if os.path.exists(vectorizer_path):
-                with open(vectorizer_path, "rb") as f:
-                    self.vectorizer = pickle.load(f)
-                print(f"Vectorizer loaded successfully from {vectorizer_path}")
-            else:
-                print(f"Vectorizer file not found: {vectorizer_path}. Creating new vectorizer.")
-                self.vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
-                # Since a new vectorizer needs training data, make sure it's fit on some sample data
-                sample_data = ["Sample resume text for software development and programming",
-                              "Sample resume for data science with machine learning experience",
-                              "Sample resume for management and leadership positions"]
-                self.vectorizer.fit(sample_data)
-                # Save the new vectorizer
-                with open(vectorizer_path, 'wb') as f:
-                    pickle.dump(self.vectorizer, f)
-                print(f"New vectorizer created and saved to {vectorizer_path}")
-        except Exception as e:
-            print(f"Error with vectorizer: {e}")
-            print("Creating new vectorizer instead...")
-            self.vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
-            # Fit on sample data
-            sample_data = ["Sample resume text for software development and programming",
-                          "Sample resume for data science with machine learning experience",
-                          "Sample resume for management and leadership positions"]
-            self.vectorizer.fit(sample_data)
-            # Try to save the new vectorizer
-            try:
-                with open(vectorizer_path, 'wb') as f:
-                    pickle.dump(self.vectorizer, f)
-                print(f"New vectorizer saved to {vectorizer_path}")
-            except Exception as save_e:
-                print(f"Couldn't save new vectorizer: {save_e}")
+        # Optional SandboxedExtractor that runs extraction under CPU/memory/time limits
+        self.sandbox = sandbox
+        
+        # PDF budgets: stop after pdf_max_pages pages or pdf_time_budget seconds,
+        # and fan pages of a single upload out to pdf_page_workers processes
+        self.pdf_max_pages = pdf_max_pages
+        self.pdf_time_budget = pdf_time_budget
+        self.pdf_page_workers = pdf_page_workers
+        
+        # Plain text above stream_text_bytes is streamed through the matcher; 0 reads everything whole
+        self.stream_text_bytes = stream_text_bytes
+        
+        # Results keyed by resume content hash; a size of 0 disables caching
+        self.result_cache = (RecommendationCache(max_bytes=result_cache_bytes, ttl=result_cache_ttl)
+                             if result_cache_bytes else None)
+        # Extracted text persisted on disk so catalog changes never force re-parsing
+        self.text_cache = ExtractedTextCache(text_cache_path) if text_cache_path else None
+        
+        # Process pool for batch text extraction, created on first use
+        self.extraction_workers = extraction_workers or os.cpu_count() or 1
+        self._extraction_pool = None
+        
+        # numpy, scipy and sklearn are imported by whichever of these needs them first
+        self.model_path = model_path
+        self.vectorizer_path = vectorizer_path
+        # Job catalog source and its compiled artifact (see catalog.py)
+        self.catalog_path = catalog_path
+        self.compiled_catalog_path = compiled_catalog_path
+        
+        # Memory-mapped artifacts (see artifacts.py) are preferred over the pickles
+        self.model_artifact_path = model_artifact_path
+        self.vectorizer_artifact_path = vectorizer_artifact_path
+        self._model = None
+        self._vectorizer = None
+        self._lazy_lock = threading.Lock()
             
         # Load or create job title mapping - expanded with additional job categories from JS code
         try:
@@ -99,9 +291,12 @@ class JobRecommendationSystem:
                     "12": "Agricultural Manager",
                     "13": "Fashion Designer"
                 }
-                with open(job_mapping_path, "w") as f:
-                    json.dump(self.job_titles, f, indent=2)
-                print(f"Default job titles created and saved to {job_mapping_path}")
+                if fast_start:
+                    print("Using default job titles without saving")
+                else:
+                    with open(job_mapping_path, "w") as f:
+                        json.dump(self.job_titles, f, indent=2)
+                    print(f"Default job titles created and saved to {job_mapping_path}")
         except Exception as e:
             print(f"Error with job titles: {e}")
             self.job_titles = {
@@ -149,451 +344,797 @@ class JobRecommendationSystem:
             
         # Initialize skill dictionaries
         self._initialize_skill_mappings()
+        
+        # A default model is fit on the job titles and catalog, so it loads after them
+        if not fast_start:
+            self._vectorizer = self._load_vectorizer()
+            self._model = self._load_model(self._vectorizer)
 
     def _initialize_skill_mappings(self):
-        """Initialize the skill mappings for job categories"""
-        # Define skills for each job title
-        self.job_skills = {
-            "Data Scientist": ["python", "sql", "data visualization", "statistics", "analytics", 
-                              "data analysis", "pandas", "numpy", "sklearn", "tensorflow", "visualization", 
-                              "jupyter", "ai", "artificial intelligence", "algorithms", "statistical", 
-                              "big data", "data mining", "database", "deep learning", "nlp", "tableau",
-                              "power bi", "machine learning", "r", "spss", "matlab", "data science"],
-                              
-            "Software Engineer": ["software", "programming", "development", "java", "python", "javascript", 
-                                 "code", "algorithm", "api", "web", "full stack", "backend", "frontend", 
-                                 "app", "mobile", "cloud", "github", "git", "debugging", "testing", "agile", 
-                                 "software design", "object oriented", "oop", "react", "angular", "node",
-                                 "c++", "c#", "php", ".net", "ruby", "scala", "rust", "go", "azure", "aws",
-                                 "devops", "microservices", "rest api", "graphql"],
-                                 
-            "Product Manager": ["product", "management", "strategy", "roadmap", "agile", "scrum", "user experience", 
-                               "prioritization", "stakeholder", "business", "customer", "market research", 
-                               "feature", "specification", "project management", "competitive analysis", 
-                               "product development", "launch", "requirements", "backlog", "jira",
-                               "product owner", "mvp", "user stories", "product vision", "a/b testing",
-                               "product metrics", "okrs", "sprint planning", "user feedback", "product lifecycle"],
-                               
-            "UX Designer": ["design", "user experience", "ux", "ui", "wireframe", "prototype", "usability", 
-                          "sketch", "figma", "adobe", "visual design", "interaction", "user research", 
-                          "interface", "accessibility", "information architecture", "design thinking", 
-                          "user testing", "storyboard", "persona", "user journey", "creative", "adobe xd",
-                          "invision", "zeplin", "typography", "color theory", "user interface", "responsive design"],
-                          
-            "DevOps Engineer": ["devops", "ci/cd", "pipeline", "aws", "cloud", "docker", "kubernetes", 
-                               "infrastructure", "linux", "automation", "jenkins", "terraform", "ansible", 
-                               "monitoring", "deployment", "configuration", "security", "networking", 
-                               "containers", "microservices", "git", "continuous integration", "azure", "gcp",
-                               "prometheus", "grafana", "puppet", "chef", "bash", "scripting", "nginx", "apache"],
-                               
-            "Chef": ["culinary", "cooking", "chef", "kitchen", "food", "recipe", "cuisine", "baking", 
-                    "pastry", "catering", "restaurant", "menu", "sous chef", "head chef", "executive chef", 
-                    "food preparation", "gastronomy", "hospitality", "nutrition", "food safety", "culinary arts", 
-                    "buffet", "food service", "meal planning", "fine dining", "saute", "grill", "taste", 
-                    "flavor", "ingredients", "dietary", "butchery", "garde manger", "banquet"],
-
-            "Pastry Chef": ["desserts", "baking", "patisserie", "confectionery", "sweet treats", "pastry arts", "cake decorating", 
-                            "fondant", "ganache", "whisking", "meringue", "custard", "glazing", "sugar work", "chocolate tempering", 
-                            "artisan baking", "viennoiserie", "bread-making", "laminate dough", "torte", "proofing", "buttercream", 
-                            "caramelization", "flavor pairing", "plating", "food styling", "pastry techniques", "garde manger", 
-                            "dough preparation", "buffet", "banquet", "hospitality", "culinary arts", "food service", "meal planning", 
-                            "fine dining", "ingredients", "nutrition", "food safety", "gastronomy", "menu creation", 
-                            "executive pastry chef"],
-
-            "Executive Chef": ["menu creation", "kitchen management", "restaurant operations", "culinary leadership", "food safety", 
-                               "staff training", "inventory control", "cost management", "fine dining", "gastronomy"],
-
-            "SOUS Chef": ["food preparation", "team supervision", "kitchen coordination", "recipe execution", "menu development", 
-                          "culinary techniques", "restaurant service", "flavor balancing"],
-
-            "Garde Manger Chef": ["cold dishes", "appetizers", "charcuterie", "salads", "plating", "buffet", "banquet", "food styling", 
-                                  " food presentation", "flavor pairing"],
-
-            "Saucier Chef": ["sauces", "stocks", "braising", "saute", "reduction", "flavor infusion", "garnishing", "culinary techniques"],
-
-            "Private Chef": ["custom meal planning", "exclusive dining", "nutrition", "dietary cooking", "personalized recipes", "high-end dining", 
-                             "seasonal ingredients"],
-
-            "Nutritionist Chef": ["healthy cooking", "diet planning", "balanced meals", "nutritional science"],
-
-            "Cruise Ship Chef": ["international cuisine", "buffet service", "high-volume cooking", "cruise hospitality"],
-
-            "Consultant Chef": ["culinary consulting", "menu optimization", "restaurant efficiency", "food innovation", "business development"],
-
-            "Marketing Manager": ["marketing", "strategy", "brand", "social media", "market research", 
-                                 "campaigns", "digital marketing", "marketing strategy", "customer relations", 
-                                 "analytics", "advertising", "seo", "content marketing", "marketing automation",
-                                 "branding", "marketing campaign", "email marketing", "lead generation", 
-                                 "content strategy", "marketing analytics", "google analytics", "ppc", "sem", 
-                                 "cro", "copywriting", "marketing communications", "public relations"],
-                                 
-            "Sales Representative": ["sales", "business development", "customer acquisition", "account management", 
-                                    "negotiation", "client relations", "pipeline", "crm", "quotas", "leads", 
-                                    "prospecting", "sales strategy", "b2b", "b2c", "relationship management",
-                                    "sales funnel", "closing deals", "sales pitch", "cold calling", "salesforce",
-                                    "sales forecasting", "territory management", "customer success", "solution selling", 
-                                    "consultative selling", "sales presentations"],
-                                    
-            "Project Manager": ["project management", "team leadership", "project planning", "stakeholder management", 
-                               "budgeting", "agile", "scrum", "waterfall", "project delivery", "resource management", 
-                               "timelines", "risk management", "pmp", "strategic planning", "jira", "ms project",
-                               "project coordination", "change management", "project scheduling", "project documentation",
-                               "requirements gathering", "issue tracking", "critical path", "status reporting",
-                               "project lifecycle", "kanban", "sprint planning"],
-                               
-            "Financial Analyst": ["financial analysis", "excel", "finance", "accounting", "reporting", "financial modeling", 
-                                 "forecasting", "budgeting", "investment", "valuation", "financial statements", 
-                                 "business analysis", "sap", "financial planning", "data analysis", "balance sheet",
-                                 "income statement", "cash flow", "variance analysis", "profitability analysis",
-                                 "p&l", "kpi reporting", "financial metrics", "equity research", "business intelligence"],
-                                 
-            "Accountant": ["accounting", "bookkeeping", "financial reporting", "tax preparation", "quickbooks", 
-                          "auditing", "cpa", "general ledger", "accounts payable", "accounts receivable", 
-                          "reconciliation", "balance sheet", "income statement", "financial statements", "erp systems",
-                          "tax returns", "gaap", "fixed assets", "accruals", "journal entries", "month-end close",
-                          "payroll processing", "cash management", "cost accounting", "financial controls"],
-
-            "Tax Accountant": ["tax preparation", "tax compliance", "IRS regulations", "tax returns", "income tax", 
-                               "corporate tax", "sales tax", "tax deductions", "audit defense", "tax laws", "estate tax", 
-                               "financial statements", "GAAP", "tax strategy", "cost accounting"],
-
-            "Auditor": ["auditing", "internal controls", "financial compliance", "risk assessment", "forensic accounting", 
-                        "fraud detection", "regulatory reporting", "audit procedures", "GAAP", "financial statements", 
-                        "Sarbanes-Oxley", "account reconciliations"],
-
-            "Forensic Accountant": ["forensic accounting", "fraud investigation", "financial crime", "money laundering", 
-                                    "litigation support", "criminal investigations", "internal controls", "audit trails", 
-                                    "business valuation", "compliance auditing"],
-
-            "Financial Accountant": ["financial reporting", "balance sheet", "income statement", "GAAP", "IFRS", "general ledger", 
-                                     "financial analysis", "accounting software", "ERP systems", "financial controls", 
-                                     "month-end close", "fixed assets", "journal entries"],
-
-            "Cost Accountant": ["cost accounting", "budgeting", "variance analysis", "manufacturing costs", "profitability analysis", 
-                                "inventory valuation", "activity-based costing", "cost estimation", "financial forecasting", 
-                                "management accounting"],
-
-            "Management Accountant": ["financial planning", "strategic budgeting", "corporate finance", "cost analysis", 
-                                      "performance evaluation", "business strategy", "cash flow management", "profit and loss analysis", 
-                                      "investment analysis", "decision support"],
-
-            "Payroll Accountant": ["payroll processing", "salary calculations", "tax withholding", "employee benefits", 
-                                   "payroll compliance", "wage laws", "HR accounting", "tax filings", "account reconciliation", 
-                                   "cash management"],
-
-            "Government Accountant": ["public finance", "government budgeting", "federal accounting", "state financial regulations", 
-                                      "tax compliance", "grant accounting", "fund accounting", "GAO audits", "government contracts", 
-                                      "public sector finance"],
-
-            "Investment Accountant": ["investment reporting", "portfolio accounting", "financial instruments", "stock valuation", 
-                                      "hedge fund accounting", "risk assessment", "cash management", "bond accounting", 
-                                      "equity analysis", "fund administration"],
-
-            "CPA (Certified Public Accountant)": ["certification", "public accounting", "audit experience", "GAAP compliance", 
-                                                  "tax advising", "financial analysis", "consulting", "industry regulations", 
-                                                  "client accounting", "business finance"],
-                          
-            "Legal Counsel": ["legal", "law", "lawyer", "attorney", "legal research", "contract review", 
-                             "client consultation", "case management", "dispute resolution", "negotiation", 
-                             "legal compliance", "regulatory", "intellectual property", "litigation", "legal advice",
-                             "contracts", "legal documents", "legal analysis", "legal writing", "briefs", "counseling",
-                             "corporate law", "legal risk", "legal proceedings", "legal strategy"],
-                             
-            "Agricultural Manager": ["agriculture", "farming", "crop management", "agricultural operations", 
-                                    "soil science", "farm equipment", "livestock", "agronomy", "harvest", 
-                                    "irrigation", "sustainable farming", "agricultural research", "precision agriculture",
-                                    "cultivation", "fertilizer", "pesticides", "farm management", "agricultural economics",
-                                    "crop rotation", "farm equipment", "animal husbandry", "organic farming"],
-                                    
-            "Fashion Designer": ["fashion", "design", "apparel", "garment", "textile", "cad", "trend analysis", 
-                                "clothing", "collection", "fashion industry", "pattern making", "sketching", 
-                                "sustainable fashion", "product development", "merchandising", "sewing",
-                                "fashion trends", "fashion marketing", "couture", "retail", "fashion illustration",
-                                "textiles", "fabric selection", "color coordination", "fashion shows"],
-
-            "Graphic Designer": ["visual design", "branding", "typography", "illustration", "logo design", 
-                                 "layout", "vector art", "color theory", "digital media", "adobe creative suite", 
-                                 "print design", "UI/UX", "composition", "marketing design", "packaging", "infographics", 
-                                 "motion graphics", "web design", "photo editing"],
-
-            "Interior Designer": ["space planning", "aesthetics", "home decor", "furniture design", "lighting", "color theory", 
-                                  "architecture", "floor planning", "sustainable design", "CAD", "3D modeling", "materials selection", 
-                                  "design psychology", "functional spaces", "renovation", "real estate styling", "commercial interiors"],
-
-            "UX Designer": ["user experience", "wireframing", "prototyping", "interaction design", "usability testing", "design thinking", 
-                            "Figma", "Adobe XD", "UI components", "mobile design", "responsive design", "human-centered design", 
-                            "information architecture", "accessibility", "web design", "app development", "navigation design"],
-
-            "Industrial Designer": ["product design", "ergonomics", "prototyping", "materials science", "manufacturing processes", 
-                                    "CAD", "engineering aesthetics", "branding", "mechanical design", "3D rendering", 
-                                    "sustainable production", "concept development", "usability testing", "consumer products", 
-                                    "innovation", "design research"],
-
-            "Game Designer": ["game mechanics", "level design", "storyboarding", "interactive storytelling", "UI/UX for gaming", 
-                              "character design", "animation", "game engines", "3D modeling", "physics simulations", "world-building", 
-                              "game testing", "sound design", "narrative development", "virtual environments", "art direction"],
-
-            "Web Designer": ["HTML", "CSS", "JavaScript", "responsive design", "user interface", "CMS", "SEO optimization", 
-                             "front-end development", "wireframing", "animation", "color palettes", "page layout", "typography", 
-                             "e-commerce design", "branding", "digital marketing", "web performance"],
-
-            "Floral Designer": ["floral design", "flower arrangement", "bouquet crafting", "wedding florals", "event styling", 
-                                "botanical artistry", "color theory", "seasonal flowers", "plant care", "garden aesthetics", 
-                                "centerpieces", "floral foam", "horticulture", "flower preservation", "floral installations", 
-                                "floral retail", "floral trends", "sustainable floristry", "bridal bouquets", "corporate floral design", 
-                                "floral sculpture", "greenery styling", "custom arrangements", "flower markets", "indoor plants"]
-        }
+        """Load the compiled job catalog (see catalog.py) and index it for scoring"""
+        self.index = CatalogIndex(load_catalog(self.compiled_catalog_path, self.catalog_path),
+                                  hashing=self.featurization == "hashing")
+        if not self.fast_start:
+            self.index.job_skill_matrix
+            self.index.similarity
         
-        # Define missing skills for each job title
-        self.missing_skills_mapping = {
-            "Data Scientist": ["TensorFlow", "Big Data", "Cloud Platforms", "Deep Learning", "NLP"],
-            "Software Engineer": ["Kubernetes", "AWS", "CI/CD", "Microservices", "GraphQL"],
-            "Product Manager": ["Data Analysis", "Technical Knowledge", "Agile Certification", "Product Metrics"],
-            "UX Designer": ["Motion Design", "Design Systems", "Frontend Coding", "User Research"],
-            "DevOps Engineer": ["Kubernetes", "Terraform", "Cloud Architecture", "Security Automation"],
-            "Chef": ["Advanced Pastry", "International Cuisine", "Nutrition Science", "Menu Costing"],
-            "Pastry Chef": ["Advanced Baking", "Dessert Plating", "Sugar Crafting", "Chocolate Tempering"],
-            "Executive Chef": ["Menu Engineering", "Culinary Leadership", "Kitchen Operations", "Cost Control"],
-            "Sous Chef": ["Team Management", "Recipe Execution", "Kitchen Coordination", "Food Preparation"],
-            "Garde Manger Chef": ["Cold Dish Preparation", "Appetizer Crafting", "Charcuterie Techniques", "Food Styling"],
-            "Private Chef": ["Custom Meal Planning", "Exclusive Dining", "Dietary Adaptation", "Personalized Recipes"],
-            "Nutritionist Chef": ["Healthy Cooking", "Balanced Meals", "Diet Planning", "Nutritional Science"],
-            "Cruise Ship Chef": ["International Cuisine", "Buffet Management", "High-Volume Cooking", "Hospitality Operations"],
-            "Consultant Chef": ["Culinary Consulting", "Menu Optimization", "Restaurant Efficiency", "Food Innovation"],
-            "Saucier Chef": ["Sauce Creation", "Flavor Reduction", "Garnishing Techniques", "Culinary Infusion"],
-            "Marketing Manager": ["SEO", "Content Marketing", "Marketing Automation", "Analytics"],
-            "Sales Representative": ["Advanced Sales Techniques", "Industry Certifications", "Data Analysis"],
-            "Project Manager": ["Agile Methodologies", "Resource Optimization", "Strategic Planning"],
-            "Financial Analyst": ["Financial Modeling", "SAP", "Forecasting", "Data Visualization"],
-            "Accountant": ["CPA Certification", "ERP Systems", "Advanced Excel", "Financial Modeling"],
-            "Legal Counsel": ["Specialized Law Practice", "Negotiation", "Legal Tech Tools", "Dispute Resolution"],
-            "Agricultural Manager": ["Precision Agriculture", "AgriTech", "Sustainable Practices", "Supply Chain Management"],
-            "Fashion Designer": ["Sustainable Fashion", "3D Modeling", "Supply Chain", "E-commerce Integration"],
-            "Graphic Designer": ["Creative Direction", "Advanced Typography", "Marketing Strategy", "Data Visualization"],
-            "Interior Designer": ["Structural Design", "Real Estate Development", "Advanced CAD", "Building Codes"],
-            "UX Designer": ["Psychological Research", "AI Integration", "Voice UI Design", "Data Analytics"],
-            "Industrial Designer": ["Mechanical Engineering", "Material Chemistry", "Robotics Design", "Manufacturing Logistics"],
-            "Game Designer": ["AI Scripting", "3D Physics", "Advanced Animation", "Virtual Reality Development"],
-            "Web Designer": ["Cybersecurity", "Advanced JavaScript", "Database Management", "SEO Analytics"],
-            "Floral Designer": ["Advanced Flower Preservation", "Luxury Floral Branding", "Digital Floral Marketing", 
-        "3D Floral Sculpting", "Sustainable Floristry", "Business Management for Florists", "Wholesale Flower Sourcing", 
-        "Event Coordination", "Creative Concept Development", "Cross-disciplinary Design Integration", "AI-driven Floral Customization"],
-        "Tax Accountant": ["International Taxation", "Tax Law Interpretation", "Advanced Tax Strategy", "Cryptocurrency Tax Compliance"],
-        "Auditor": ["IT Auditing", "Cybersecurity Risk Assessment", "AI-driven Fraud Detection", "Government Regulatory Compliance"],
-        "Forensic Accountant": ["Blockchain Forensics", "Digital Financial Crime Investigation", "Legal Litigation Support", "Financial Profiling"],
-        "Financial Accountant": ["Integrated Reporting", "Financial Risk Management", "Predictive Analytics", "Advanced ERP Systems"],
-        "Cost Accountant": ["Lean Accounting", "Activity-Based Costing", "Advanced Budget Modeling", "Strategic Cost Reduction"],
-        "Management Accountant": ["Corporate Governance", "Behavioral Economics in Finance", "Leadership in Accounting", "Business Intelligence Tools"],
-        "Payroll Accountant": ["Payroll Tax Strategy", "HR Finance Integration", "Employee Compensation Analytics", "Automated Payroll Systems"],
-        "Government Accountant": ["Public Finance Transparency", "Federal Grant Reporting", "Municipal Finance Regulations", "Government Cost Allocation"],
-        "Investment Accountant": ["Portfolio Risk Analysis", "Hedge Fund Valuation", "Cryptocurrency Investment Accounting", "Global Securities Accounting"],
-        "CPA (Certified Public Accountant)": ["Advanced Advisory Services", "Public Trust Management", "Ethical Accounting Standards", "Cross-border Financial Regulations"]
-        }
+        # Catalog reloads run on one background thread; requests that arrive
+        # while it is busy are merged into a single follow-up reload
+        self._reload_lock = threading.Lock()
+        self._reloading = False
+        self._reload_pending = False
+        self.catalog_reloads = 0
+        self.incremental_reloads = 0
+        self.failed_reloads = 0
+        self.last_reload_error = None
+
+    # Read-only views of the current catalog for callers outside this class
+    @property
+    def catalog_version(self):
+        return self.index.catalog_version
+
+    @property
+    def job_skills(self):
+        return self.index.job_skills
+
+    @property
+    def missing_skills_mapping(self):
+        return self.index.missing_skills_mapping
+
+    @property
+    def company_mapping(self):
+        return self.index.company_mapping
+
+    @property
+    def title_postings(self):
+        return self.index.title_postings
+
+    @property
+    def model_scores_disabled(self):
+        """Why hybrid scores leave the model out, or None while it can score"""
+        return self._model_unusable
+
+    def reload_catalog(self):
+        """Load the catalog files again and swap in a new index if the catalog changed
         
-        # Define companies for each job title
-        self.company_mapping = {
-           "Data Scientist": "Analytics Co.",
-      "Software Engineer": "Tech Innovations",
-      "Product Manager": "Product Innovations Inc.",
-      "UX Designer": "Creative Designs Inc.",
-      "DevOps Engineer": "Cloud Systems Inc.",
-      "Chef": "Culinary Innovations",
-      "Pastry Chef": "Le Cordon Bleu",
-      "Executive Chef": "The Ritz-Carlton",
-      "Sous Chef": "The Savoy",
-      "Garde Manger Chef": ["Hotel Banquets, ", "Cruise Line Dining"],
-      "Private Chef": ["Celebrity Residences, ", "Private Estates"],
-      "Nutritionist Chef": ["Hospitals, ", "Wellness Resorts"],
-      "Cruise Ship Chef": ["Royal Caribbean, ", "Carnival Cruise Line"],
-      "Consultant Chef": ["Restaurant Consulting Firms, ", "Hospitality Groups"],
-      "Saucier Chef": ["French Restaurants, ", "Steakhouses"],
-      "Marketing Manager": "Growth Strategies Inc.",
-      "Sales Representative": "Sales Experts Ltd.",
-      "Project Manager": "Enterprise Solutions",
-      "Financial Analyst": "Capital Management",
-      "Accountant": "Financial Solutions",
-      "Legal Counsel": "Corporate Legal Partners",
-      "Agricultural Manager": "FarmTech Solutions",
-      "Fashion Designer": "Trendsetter Apparel",
-      "Graphic Designer": ["Adobe, ", "Canva"],
-      "Interior Designer": ["IKEA, ", "Gensler"],
-      "UX Designer": ["Google, ", "Meta, ", "Microsoft, ", "Apple, ", "Amazon, ", "IBM, ", "Figma, ", "Adobe XD, ", "Spotify, ", "Salesforce"],
-      "Industrial Designer": ["Tesla, ", "IDEO"],
-      "Game Designer": ["Nintendo, ", "Ubisoft"],
-      "Floral Designer": "Farmgirl Flowers",
-      "Web Designer": ["Wix, ", "Squarespace, ", "WordPress, ", "Shopify, ", "Google"],
-      "Tax Accountant": ["Deloitte"],
-        "Auditor": ["PwC (PricewaterhouseCoopers)"],
-        "Forensic Accountant": ["Kroll"],
-        "Financial Accountant": ["EY (Ernst & Young)"],
-        "Cost Accountant": ["Caterpillar Inc."],
-        "Management Accountant": ["IBM"],
-        "Payroll Accountant": ["ADP"],
-        "Government Accountant": ["U.S. Department of the Treasury"],
-        "Investment Accountant": ["BlackRock"],
-        "CPA (Certified Public Accountant)": ["AICPA (American Institute of CPAs)"],
-        }
+        Returns True when a new catalog version was swapped in. Raises
+        CatalogError when the catalog cannot be loaded; the current one stays.
+        """
+        catalog = load_catalog(self.compiled_catalog_path, self.catalog_path)
+        previous = self.index
+        if catalog.catalog_version == previous.catalog_version:
+            print(f"Job catalog {catalog.catalog_version} is unchanged")
+            return False
+        
+        index = CatalogIndex(catalog, previous, hashing=self.featurization == "hashing")
+        # Build the score matrix here instead of on the next request
+        index.job_skill_matrix
+        if previous._similarity is not None:
+            index.similarity
+        # A single reference assignment, requests see the old or the new index
+        self.index = index
+        
+        with self._reload_lock:
+            self.catalog_reloads += 1
+            if index.changed_jobs is not None:
+                self.incremental_reloads += 1
+        if index.changed_jobs is None:
+            print(f"Job catalog {previous.catalog_version} -> {index.catalog_version}: full rebuild")
+        else:
+            print(f"Job catalog {previous.catalog_version} -> {index.catalog_version}: "
+                  f"{len(index.changed_jobs)} jobs re-indexed")
+        return True
+
+    def request_catalog_reload(self):
+        """Reload the catalog on a background thread
+        
+        Returns False when a reload is already running, in which case it runs
+        once more after finishing so the latest files are picked up.
+        """
+        with self._reload_lock:
+            if self._reloading:
+                self._reload_pending = True
+                return False
+            self._reloading = True
+        threading.Thread(target=self._reload_worker, name="catalog-reload", daemon=True).start()
+        return True
+
+    def _reload_worker(self):
+        """Background thread body: reload until no further reload was requested"""
+        while True:
+            try:
+                self.reload_catalog()
+            except Exception as e:
+                print(f"Error reloading job catalog, keeping {self.index.catalog_version}: {e}")
+                with self._reload_lock:
+                    self.failed_reloads += 1
+                    self.last_reload_error = str(e)
+            with self._reload_lock:
+                if not self._reload_pending:
+                    self._reloading = False
+                    return
+                self._reload_pending = False
+
+    def watch_catalog(self, interval=5.0):
+        """Poll the catalog source and compiled artifact, reloading when either changes"""
+        def signature():
+            stamps = []
+            for path in (self.catalog_path, self.compiled_catalog_path):
+                try:
+                    stat = os.stat(path)
+                    stamps.append((stat.st_mtime_ns, stat.st_size))
+                except OSError:
+                    stamps.append(None)
+            return stamps
+        
+        def watch():
+            last = signature()
+            while True:
+                time.sleep(interval)
+                current = signature()
+                if current != last:
+                    last = current
+                    print("Job catalog files changed, reloading")
+                    self.request_catalog_reload()
+        
+        threading.Thread(target=watch, name="catalog-watcher", daemon=True).start()
+
+    def catalog_stats(self):
+        """Counters for monitoring catalog reloads"""
+        index = self.index
+        with self._reload_lock:
+            return {
+                "version": index.catalog_version,
+                "jobs": len(index.job_index_titles),
+                "featurization": self.featurization,
+                "reloads": self.catalog_reloads,
+                "incremental_reloads": self.incremental_reloads,
+                "failed_reloads": self.failed_reloads,
+                "last_reload_error": self.last_reload_error,
+                "reloading": self._reloading,
+            }
+
+    @property
+    def model(self):
+        """RandomForest classifier, loaded on first use in fast-start mode"""
+        if self._model is None:
+            # Taken before the lock, which is not reentrant; a default model is fit on its features
+            vectorizer = self.vectorizer
+            with self._lazy_lock:
+                if self._model is None:
+                    self._model = self._load_model(vectorizer)
+        return self._model
+
+    @property
+    def vectorizer(self):
+        """TF-IDF vectorizer, loaded on first use in fast-start mode"""
+        if self._vectorizer is None:
+            with self._lazy_lock:
+                if self._vectorizer is None:
+                    self._vectorizer = self._load_vectorizer()
+        return self._vectorizer
+
+    def _load_model(self, vectorizer):
+        """Load the model artifact or pickle, creating a default model if neither is usable
+        
+        The default model is fit on vectorizer's features. Outside fast-start
+        mode it is also saved to model_path.
+        """
+        if os.path.exists(self.model_artifact_path):
+            try:
+                from artifacts import load_model
+                model = load_model(self.model_artifact_path)
+                print(f"Model memory-mapped from {self.model_artifact_path}")
+                return model
+            except Exception as e:
+                print(f"Error with model artifact: {e}")
+        
+        model_path = self.model_path
+        save = not self.fast_start
+        try:
+            if os.path.exists(model_path):
+                with open(model_path, 'rb') as f:
+                    model = pickle.load(f)
+                print(f"Model loaded successfully from {model_path}")
+                print("Run 'python artifacts.py convert' to load it without unpickling")
+                return model
+            print(f"Model file not found: {model_path}. Creating new model.")
+        except Exception as e:
+            print(f"Error with model: {e}")
+            print("Creating new model instead...")
+        model = self._create_default_model(vectorizer)
+        if save:
+            # Try to save the new model
+            try:
+                with open(model_path, 'wb') as f:
+                    pickle.dump(model, f)
+                print(f"New model saved to {model_path}")
+            except Exception as save_e:
+                print(f"Couldn't save new model: {save_e}")
+        return model
 
-    def _create_default_model(self):
-        """Create a default model when the saved model can't be loaded"""
+    def _load_vectorizer(self):
+        """Load the vectorizer artifact or pickle, fitting a default one if neither is usable
+        
+        Outside fast-start mode the default vectorizer is also saved to vectorizer_path.
+        """
+        if os.path.exists(self.vectorizer_artifact_path):
+            try:
+                from artifacts import load_vectorizer
+                vectorizer = load_vectorizer(self.vectorizer_artifact_path)
+                print(f"Vectorizer memory-mapped from {self.vectorizer_artifact_path}")
+                return vectorizer
+            except Exception as e:
+                print(f"Error with vectorizer artifact: {e}")
+        
+        vectorizer_path = self.vectorizer_path
+        save = not self.fast_start
+        try:
+            if os.path.exists(vectorizer_path):
+                with open(vectorizer_path, "rb") as f:
+                    vectorizer = pickle.load(f)
+                print(f"Vectorizer loaded successfully from {vectorizer_path}")
+                print("Run 'python artifacts.py convert' to load it without unpickling")
+                return vectorizer
+            print(f"Vectorizer file not found: {vectorizer_path}. Creating new vectorizer.")
+        except Exception as e:
+            print(f"Error with vectorizer: {e}")
+            print("Creating new vectorizer instead...")
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
+        # Since a new vectorizer needs training data, make sure it's fit on some sample data
+        sample_data = ["Sample resume text for software development and programming",
+                       "Sample resume for data science with machine learning experience",
+                       "Sample resume for management and leadership positions"]
+        vectorizer.fit(sample_data)
+        if save:
+            # Try to save the new vectorizer
+            try:
+                with open(vectorizer_path, 'wb') as f:
+                    pickle.dump(vectorizer, f)
+                print(f"New vectorizer saved to {vectorizer_path}")
+            except Exception as save_e:
+                print(f"Couldn't save new vectorizer: {save_e}")
+        return vectorizer
+
+    def _create_default_model(self, vectorizer):
+        """Create a default model when the saved model can't be loaded
+        
+        It is fit on vectorizer's features of each job title and its catalog
+        skills, so its inputs match what model_probabilities passes it.
+        """
+        from sklearn.ensemble import RandomForestClassifier
+        
         # Create a simple RandomForestClassifier as default
         model = RandomForestClassifier(n_estimators=100, random_state=42)
         
-        # Fit model with minimal sample data so it can make predictions
-        sample_features = np.random.rand(5, 10)  # 5 samples, 10 features
-        sample_labels = np.random.randint(0, len(self.job_titles) if hasattr(self, 'job_titles') else 14, size=5)
-        model.fit(sample_features, sample_labels)
+        # One sample per job in job_titles.json, labelled with its job id
+        labels = [int(label) for label, title in self.job_titles.items() if title in self.job_skills]
+        texts = [" ".join([self.job_titles[str(label)], *self.job_skills[self.job_titles[str(label)]]]).lower()
+                 for label in labels]
+        model.fit(vectorizer.transform(texts).toarray(), labels)
         
         return model
 
-    def extract_text_from_resume(self, file_path):
-        """Extract text from PDF, DOCX or TXT resume files."""
-        if not os.path.exists(file_path):
-            print(f"Resume file not found: {file_path}")
-            return ""
-            
+    def extract_text_from_resume(self, file_path, filename=None):
+        """Extract text from PDF, DOCX or TXT resume files, paths, bytes or streams."""
+        return self._extract_resume(file_path, filename)[0]
+
+    def _extract_resume(self, source, filename=None):
+        """Extract (text, metadata) for one resume using the configured PDF budgets
+        
+        Raises ExtractionRejected when the sandbox kills the extraction.
+        """
+        if self.sandbox is not None:
+            # Page fan-out would escape the sandbox limits, so pages run serially there
+            return self.sandbox.extract(source, filename, max_pages=self.pdf_max_pages,
+                                        time_budget=self.pdf_time_budget)
+        return extract_resume(source, filename, max_pages=self.pdf_max_pages,
+                              time_budget=self.pdf_time_budget, page_workers=self.pdf_page_workers)
+
+    def _content_hash(self, source):
+        """Hash of the resume bytes when a cache needs it, or None"""
+        if self.result_cache is None and self.text_cache is None:
+            return None
         try:
-            if file_path.lower().endswith(".pdf"):
-                print(f"Extracting text from PDF: {file_path}")
-                with pdfplumber.open(file_path) as pdf:
-                    text = "\n".join(page.extract_text() or "" for page in pdf.pages)
-                    if not text.strip():
-                        print("Warning: PDF text extraction returned empty content")
-                    return text
-                    
-            elif file_path.lower().endswith(".docx"):
-                print(f"Extracting text from DOCX: {file_path}")
-                doc = docx.Document(file_path)
-                return "\n".join(paragraph.text for paragraph in doc.paragraphs)
-                
-            elif file_path.lower().endswith(".txt"):
-                print(f"Reading text file: {file_path}")
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    return f.read()
-            else:
-                print("Unsupported file format. Only .pdf, .docx, and .txt are supported.")
-                return ""
+            return content_hash(source)
+        except (OSError, AttributeError, ValueError) as e:
+            print(f"Warning: Could not hash resume for caching: {e}")
+            return None
+
+    def _result_cache_key(self, resume_hash, top_k, index, method="keyword"):
+        """Cache key from the resume hash, catalog version, top_k and ranking method, or None"""
+        if self.result_cache is None or resume_hash is None:
+            return None
+        return f"{resume_hash}:{index.catalog_version}:{top_k}:{method}"
+
+    def _cached_text(self, resume_hash, filename=None):
+        """Previously extracted (text, metadata) for this resume, or None
+        
+        The metadata is the original extraction's, such as the PDF backend,
+        marked "cached"; declared_extension is worked out for this filename.
+        """
+        if self.text_cache is None or resume_hash is None:
+            return None
+        cached = self.text_cache.get(resume_hash, EXTRACTOR_VERSION)
+        if cached is None:
+            return None
+        resume_text, extraction = cached
+        extraction["cached"] = True
+        extension = mismatched_extension(filename, extraction["format"]) if "format" in extraction else None
+        if extension:
+            extraction["declared_extension"] = extension
+        return resume_text, extraction
+
+    def _store_text(self, resume_hash, resume_text, extraction):
+        """Persist extracted text; failed or truncated extractions are not cached"""
+        if (self.text_cache is not None and resume_hash is not None and resume_text
+                and not extraction.get("truncated")):
+            # The declared extension belongs to the upload, not the content
+            metadata = {key: value for key, value in extraction.items() if key != "declared_extension"}
+            self.text_cache.put(resume_hash, EXTRACTOR_VERSION, resume_text, metadata)
+
+    def _get_extraction_pool(self):
+        """Return the shared process pool used for batch extraction"""
+        if self._extraction_pool is None:
+            self._extraction_pool = ProcessPoolExecutor(max_workers=self.extraction_workers)
+        return self._extraction_pool
+
+    def extract_resumes_parallel(self, sources):
+        """Extract (text, metadata) for many (path or bytes, filename) pairs on the process pool"""
+        paths_or_bytes = [source for source, _ in sources]
+        filenames = [filename for _, filename in sources]
+        if self.sandbox is not None:
+            return self.sandbox.extract_many(sources, max_pages=self.pdf_max_pages,
+                                             time_budget=self.pdf_time_budget)
+        
+        # Files are already spread over the pool, so pages are extracted serially
+        extract = partial(extract_resume, max_pages=self.pdf_max_pages, time_budget=self.pdf_time_budget)
+        if len(sources) <= 1:
+            return list(map(extract, paths_or_bytes, filenames))
+        
+        try:
+            pool = self._get_extraction_pool()
+            return list(pool.map(extract, paths_or_bytes, filenames, chunksize=4))
         except Exception as e:
-            print(f"Error extracting text from {file_path}: {e}")
-            return ""
-
-    def extract_skills_from_resume(self, resume_text):
-        """Extract skills from resume text using the job skills dictionary"""
-        resume_text = resume_text.lower()
-        extracted_skills = set()
-        
-        # First pass: Look for exact matches of multi-word skills
-        for job_title, skills in self.job_skills.items():
-            for skill in skills:
-                if len(skill.split()) > 1:  # Only check multi-word skills
-                    if skill.lower() in resume_text:
-                        extracted_skills.add(skill)
-                        
-        # Second pass: Look for single word skills with word boundaries
-        for job_title, skills in self.job_skills.items():
-            for skill in skills:
-                if len(skill.split()) == 1:  # Only check single-word skills
-                    # Use regex word boundary to avoid partial matches
-                    if re.search(r'\b' + re.escape(skill.lower()) + r'\b', resume_text):
-                        extracted_skills.add(skill)
-        
-        return list(extracted_skills)
-
-    def get_recommendations(self, resume_file_path):
-        """Process resume and get job recommendations"""
-        print(f"Processing resume: {resume_file_path}")
-        
-        resume_text = self.extract_text_from_resume(resume_file_path)
+            # A broken pool is discarded and the batch is extracted in-process
+            print(f"Parallel extraction failed, falling back to serial extraction: {e}")
+            if self._extraction_pool is not None:
+                self._extraction_pool.shutdown(wait=False, cancel_futures=True)
+                self._extraction_pool = None
+            return list(map(extract, paths_or_bytes, filenames))
+
+    def _stream_text_document(self, source, filename, index):
+        """Matched ResumeDocument for a large plain text resume, or None if it should be extracted whole
+        
+        The text is decoded and matched one chunk at a time, so memory does
+        not grow with the file. Decoding text runs no parser, so this skips
+        the extraction sandbox.
+        """
+        if not self.stream_text_bytes:
+            return None
+        try:
+            if source_size(source) <= self.stream_text_bytes or sniff_format(source) != "txt":
+                return None
+        except (OSError, AttributeError, ValueError):
+            # Missing or unreadable sources are reported by the normal extraction path
+            return None
+        
+        print(f"Streaming large text resume: {filename}")
+        extraction = {"format": "txt", "truncated": False, "streamed": True}
+        document = ResumeDocument.from_chunks(iter_text_chunks(source), index, filename, extraction)
+        extraction["chars"] = document.text_length
+        return document
+
+    def match_resume(self, document, index=None):
+        """Run the skill matcher once over the document's normalized text
+        
+        document may be a ResumeDocument or plain resume text. Returns the matches.
+        """
+        return ResumeDocument.of(document).match(index or self.index)
+
+    def extract_skills_from_resume(self, document, index=None):
+        """Extract skills from a resume using the job skills dictionary"""
+        document = ResumeDocument.of(document)
+        document.match(index or self.index)
+        return document.extracted_skills
+
+    def get_recommendations(self, resume_file_path, top_k=3, filename=None, method="keyword"):
+        """Process resume and get job recommendations
+        
+        resume_file_path may also be bytes or a file-like upload stream, in
+        which case filename names the original file. method is one of
+        RANKING_METHODS.
+        """
+        filename = os.path.basename(filename or source_name(resume_file_path))
+        print(f"Processing resume: {filename}")
+        # One catalog version for the whole request, even if a reload swaps it meanwhile
+        index = self.index
+        
+        # Repeat uploads of the same file are answered without re-parsing it
+        resume_hash = self._content_hash(resume_file_path)
+        cache_key = self._result_cache_key(resume_hash, top_k, index, method)
+        if cache_key is not None:
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                print("Returning cached recommendations")
+                return cached
+        
+        timings = {}
+        started = time.perf_counter()
+        # Large plain text is matched while it is read; only an excerpt of it is kept
+        document = self._stream_text_document(resume_file_path, filename, index)
+        if document is not None:
+            resume_text, extraction = document.raw_text, document.extraction
+            timings["stream"] = time.perf_counter() - started
+        else:
+            cached = self._cached_text(resume_hash, filename)
+            if cached is None:
+                resume_text, extraction = self._extract_resume(resume_file_path, filename)
+                self._store_text(resume_hash, resume_text, extraction)
+            else:
+                print("Using cached extracted text")
+                resume_text, extraction = cached
+            timings["extract"] = time.perf_counter() - started
         
         if not resume_text:
             print("Failed to extract text from resume!")
             return {"error": "Failed to extract text from resume"}
         
-        print(f"Extracted {len(resume_text)} characters from resume")
-        
-        # Extract skills from resume
-        extracted_skills = self.extract_skills_from_resume(resume_text)
-        print(f"Extracted skills: {extracted_skills}")
+        if document is None:
+            print(f"Extracted {len(resume_text)} characters from resume")
+            
+            # Normalize and scan the resume once; every later stage reads the document
+            started = time.perf_counter()
+            document = ResumeDocument(resume_text, filename, extraction)
+            self.match_resume(document, index)
+            timings["match"] = time.perf_counter() - started
+        else:
+            print(f"Matched {document.text_length} characters from resume")
+        print(f"Extracted skills: {document.extracted_skills}")
         
-        # Always use our improved keyword-based matching using the extracted text
-        keyword_recommendations = self.get_improved_keyword_recommendations(resume_text, extracted_skills)
+        # Rank the jobs with the requested method
+        ranked = self.rank_jobs(document, top_k=top_k, method=method, index=index, timings=timings)
         
         # Format recommendations with the extracted skills
         formatted_recommendations = self.format_recommendations_with_skills(
-            resume_text=resume_text,
-            filename=os.path.basename(resume_file_path),
-            recommendations=keyword_recommendations["recommendations"],
-            extracted_skills=extracted_skills
-        )
+            document, ranked["recommendations"], index=index)
         
         # Return full results including formatted recommendations
-        return {
+        result = {
             "resume_text": resume_text,
-            "extracted_skills": extracted_skills,
-            "recommendations": keyword_recommendations["recommendations"],
-            "formatted_recommendations": formatted_recommendations
+            "extracted_skills": document.extracted_skills,
+            "recommendations": ranked["recommendations"],
+            "formatted_recommendations": formatted_recommendations,
+            "method": ranked["method"],
+            "extraction": extraction
         }
+        # Truncated results depend on the budget, so they are not cached
+        if cache_key is not None and not extraction.get("truncated"):
+            self.result_cache.put(cache_key, result)
+        self._record_timings(timings)
+        # Timings describe this run only, so they stay out of the cached result
+        return {**result, "timings": {stage: round(seconds * 1000, 3) for stage, seconds in timings.items()}}
     
-    def get_improved_keyword_recommendations(self, resume_text, extracted_skills):
-        """Improved keyword analysis for job matching using extracted resume text and skills"""
-        print("Starting improved keyword recommendations analysis...")
-        
-        # Initialize job scores dictionary
-        job_scores = {}
-        resume_text_lower = resume_text.lower()
-        
-        # Score each job category based on the extracted skills
-        for job_title, job_skills in self.job_skills.items():
-            # Start with a base score of 0
-            job_scores[job_title] = 0
-            
-            # Score based on extracted skills matching job skills
-            relevant_skills = []
-            for skill in extracted_skills:
-                if skill.lower() in (s.lower() for s in job_skills):
-                    job_scores[job_title] += 1
-                    relevant_skills.append(skill)
-            
-            # Extra points for job title mention
-            if job_title.lower() in resume_text_lower:
-                job_scores[job_title] += 5
+    def get_recommendations_batch(self, paths_or_streams, top_k=3, method="keyword", timings=None):
+        """Process many resumes at once: parallel extraction and one batched scoring pass
+        
+        Seconds spent in each stage for the whole batch are added to timings
+        when it is given.
+        """
+        print(f"Processing batch of {len(paths_or_streams)} resumes")
+        index = self.index
+        timings = {} if timings is None else timings
+        
+        # Streams stay unread until they need extracting; large text is matched straight off them
+        sources = [(item, os.path.basename(source_name(item))) for item in paths_or_streams]
+        
+        # Answer repeat resumes from the caches and only extract the rest
+        results = [None] * len(sources)
+        resume_hashes = [self._content_hash(source) for source, _ in sources]
+        cache_keys = [self._result_cache_key(resume_hash, top_k, index, method) for resume_hash in resume_hashes]
+        resume_texts = {}
+        streamed = {}
+        to_extract = []
+        for i, ((source, filename), cache_key) in enumerate(zip(sources, cache_keys)):
+            cached = self.result_cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                results[i] = {"filename": filename, **cached}
+                continue
+            started = time.perf_counter()
+            document = self._stream_text_document(source, filename, index)
+            if document is not None:
+                streamed[i] = document
+                timings["stream"] = timings.get("stream", 0) + time.perf_counter() - started
+                continue
+            cached_text = self._cached_text(resume_hashes[i], filename)
+            if cached_text is not None:
+                resume_texts[i] = cached_text
+            else:
+                to_extract.append(i)
+        
+        started = time.perf_counter()
+        # Only bytes travel to the pool, so the streams left to extract are read here
+        extracted = self.extract_resumes_parallel(
+            [(source if isinstance(source, str) else source.read(), filename)
+             for source, filename in (sources[i] for i in to_extract)])
+        for i, (resume_text, extraction) in zip(to_extract, extracted):
+            self._store_text(resume_hashes[i], resume_text, extraction)
+            resume_texts[i] = (resume_text, extraction)
+        timings["extract"] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        scored = []
+        for i, document in streamed.items():
+            if not document.raw_text:
+                print(f"Failed to extract text from resume: {document.filename}")
+                results[i] = {"filename": document.filename, "error": "Failed to extract text from resume"}
+            else:
+                scored.append((i, document))
+        for i, (resume_text, extraction) in sorted(resume_texts.items()):
+            filename = sources[i][1]
+            if extraction.get("rejected"):
+                results[i] = {"filename": filename, "error": "Resume could not be processed",
+                              "message": extraction["error"]}
+                continue
+            if not resume_text:
+                print(f"Failed to extract text from resume: {filename}")
+                results[i] = {"filename": filename, "error": "Failed to extract text from resume"}
+                continue
+            document = ResumeDocument(resume_text, filename, extraction)
+            self.match_resume(document, index)
+            scored.append((i, document))
+        
+        timings["match"] = time.perf_counter() - started
+        if not scored:
+            return results
+        
+        # Score every resume against every job with one sparse mat-mat product
+        all_scores, ceiling = self.score_resumes([document for _, document in scored], method, index, timings)
+        
+        for (i, document), scores in zip(scored, all_scores):
+            ranked = self._recommendations_from_scores(document, scores, top_k, index, ceiling, method)
+            formatted_recommendations = self.format_recommendations_with_skills(
+                document, ranked["recommendations"], index=index)
+            result = {
+                "resume_text": document.raw_text,
+                "extracted_skills": document.extracted_skills,
+                "recommendations": ranked["recommendations"],
+                "formatted_recommendations": formatted_recommendations,
+                "method": ranked["method"],
+                "extraction": document.extraction
+            }
+            if cache_keys[i] is not None and not document.extraction.get("truncated"):
+                self.result_cache.put(cache_keys[i], result)
+            results[i] = {"filename": document.filename, **result}
+        
+        self._record_timings(timings)
+        return results
+
+    def build_match_vector(self, document, index=None):
+        """Turn one resume's matches into a sparse row over the score matrix columns"""
+        import numpy as np
+        from scipy import sparse
+        
+        index = index or self.index
+        matches = document.match(index)
+        skill_columns = index.skill_columns
+        num_patterns = len(skill_columns)
+        # Columns [0, P) flag every pattern found, [P, 2P) every extracted skill;
+        # skill ids are the pattern columns of the catalog's skills
+        columns = [skill_columns[pattern] for pattern in matches.found]
+        columns.extend(num_patterns + skill_id for skill_id in document.skill_ids)
+        return sparse.csr_matrix(
+            (np.ones(len(columns)), ([0] * len(columns), columns)),
+            shape=(1, 2 * num_patterns))
+
+    def score_match_vectors(self, match_vectors, index=None):
+        """Score many resumes with one sparse product, returns a resumes x jobs array"""
+        from scipy import sparse
+        
+        resume_matrix = sparse.vstack(match_vectors, format="csr")
+        return (resume_matrix @ (index or self.index).job_skill_matrix.T).toarray()
+
+    def _model_job_columns(self, model, index):
+        """Catalog position of each model class, -1 for classes not in the catalog"""
+        import numpy as np
+        
+        cached = self._model_columns
+        if cached is not None and cached[0] == index.catalog_version:
+            return cached[1]
+        # Model classes are job ids from job_titles.json
+        columns = np.array([index.job_positions.get(self.job_titles.get(str(label)), -1)
+                            for label in model.classes_], dtype=np.intp)
+        self._model_columns = (index.catalog_version, columns)
+        return columns
+
+    def _get_model_pool(self):
+        """Threads for batched predict_proba, created on first use"""
+        if self._model_pool is None:
+            with self._lazy_lock:
+                if self._model_pool is None:
+                    self._model_pool = ThreadPoolExecutor(max_workers=self.model_n_jobs,
+                                                          thread_name_prefix="model-score")
+        return self._model_pool
+
+    def model_probabilities(self, resume_texts, index=None):
+        """RandomForest probability of every catalog job for each resume text
+        
+        Returns a resumes x jobs array, or None when the model cannot score the
+        vectorizer's features. Batches are split into chunks scored on
+        model_n_jobs threads; tree traversal runs in numpy and releases the GIL.
+        """
+        import numpy as np
+        
+        index = index or self.index
+        if self._model_unusable:
+            return None
+        model, vectorizer = self.model, self.vectorizer
+        features = vectorizer.transform(resume_texts)
+        expected = getattr(model, "n_features_in_", features.shape[1])
+        if features.shape[1] != expected:
+            self._model_unusable = (f"model expects {expected} features, "
+                                    f"vectorizer produces {features.shape[1]}")
+            print(f"Warning: Model scores disabled: {self._model_unusable}")
+            return None
+        
+        size = self.model_batch_size
+        chunks = [features[start:start + size].toarray() for start in range(0, features.shape[0], size)]
+        if len(chunks) > 1 and self.model_n_jobs > 1:
+            probabilities = np.vstack(list(self._get_model_pool().map(model.predict_proba, chunks)))
+        else:
+            probabilities = np.vstack([model.predict_proba(chunk) for chunk in chunks])
+        
+        columns = self._model_job_columns(model, index)
+        known = columns >= 0
+        scores = np.zeros((len(resume_texts), len(index.job_index_titles)))
+        scores[:, columns[known]] = probabilities[:, known]
+        return scores
+
+    def score_resumes(self, documents, method="keyword", index=None, timings=None):
+        """Score resumes against every job with one of RANKING_METHODS
+        
+        Returns (resumes x jobs scores, ceiling). ceiling is the score that maps
+        to full confidence, or None for raw keyword scores. Seconds spent in
+        each scoring stage are added to timings when it is given.
+        """
+        import numpy as np
+        
+        index = index or self.index
+        timings = {} if timings is None else timings
+        
+        def timed(stage, fn, *args):
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                timings[stage] = timings.get(stage, 0) + time.perf_counter() - started
+        
+        if method in ("keyword", "hybrid"):
+            match_vectors = [self.build_match_vector(document, index) for document in documents]
+        if method == "keyword":
+            return timed("keyword", self.score_match_vectors, match_vectors, index), None
+        
+        # Cosine similarity against the L2-normalized job profiles, in [0, 1].
+        # Hashed featurization is stateless, so big batches use the process pool
+        normalized_texts = [document.normalized_text for document in documents]
+        executor = None
+        if self.featurization == "hashing" and len(normalized_texts) > HASHING_CHUNK_SIZE:
+            executor = self._get_extraction_pool()
+        similarities = timed("tfidf", index.similarity.similarities, normalized_texts, executor)
+        if method == "tfidf":
+            return similarities, 1.0
+        
+        keyword_scores = timed("keyword", self.score_match_vectors, match_vectors, index)
+        ceilings = np.maximum(KEYWORD_SCORE_CEILING, keyword_scores.max(axis=1, keepdims=True))
+        parts = [(self.hybrid_weights.get("keyword", 0), keyword_scores / ceilings),
+                 (self.hybrid_weights.get("tfidf", 0), similarities)]
+        if self.hybrid_weights.get("model", 0) > 0:
+            started = time.perf_counter()
+            probabilities = self.model_probabilities(normalized_texts, index)
+            # A model that cannot score is skipped, so it gets no timing stage either
+            if probabilities is not None:
+                timings["model"] = timings.get("model", 0) + time.perf_counter() - started
+                parts.append((self.hybrid_weights["model"], probabilities))
+        
+        total_weight = sum(weight for weight, _ in parts)
+        blended = sum(weight * scores for weight, scores in parts)
+        return blended / (total_weight or 1), 1.0
+
+    def _record_timings(self, timings):
+        """Add one request's stage timings to the running totals"""
+        with self._timing_lock:
+            for stage, seconds in timings.items():
+                calls, total = self.stage_totals.get(stage, (0, 0.0))
+                self.stage_totals[stage] = (calls + 1, total + seconds)
+
+    def timing_stats(self):
+        """Calls, total and mean milliseconds per stage, for comparing scoring paths"""
+        with self._timing_lock:
+            totals = dict(self.stage_totals)
+        return {stage: {"calls": calls, "total_ms": round(total * 1000, 3),
+                        "mean_ms": round(total * 1000 / calls, 3)}
+                for stage, (calls, total) in totals.items()}
+
+    def select_top_jobs(self, scores, top_k=3, index=None):
+        """Pick the top_k (job, score) pairs by partial selection, ties keep catalog order"""
+        import numpy as np
+        
+        top_k = min(top_k, len(scores))
+        if top_k <= 0:
+            return []
+        if top_k < len(scores):
+            threshold = scores[np.argpartition(-scores, top_k - 1)[top_k - 1]]
+            above = np.flatnonzero(scores > threshold)
+            ties = np.flatnonzero(scores == threshold)[:top_k - len(above)]
+            candidates = np.concatenate((above, ties))
+        else:
+            candidates = np.arange(len(scores))
+        # lexsort uses the last key as primary: score descending, then catalog position
+        order = candidates[np.lexsort((candidates, -scores[candidates]))]
+        job_index_titles = (index or self.index).job_index_titles
+        return [(job_index_titles[i], float(scores[i])) for i in order]
+
+    def get_improved_keyword_recommendations(self, document, top_k=3, index=None):
+        """Improved keyword analysis for job matching using the resume's extracted skills"""
+        return self.rank_jobs(document, top_k=top_k, method="keyword", index=index)
+
+    def rank_jobs(self, document, top_k=3, method="keyword", index=None, timings=None):
+        """Rank every job for one resume with one of RANKING_METHODS"""
+        print(f"Starting {method} recommendations analysis...")
+        index = index or self.index
+        document = ResumeDocument.of(document)
+        matches = document.match(index)
+        
+        for pattern in matches.found:
+            for job_title, _ in index.title_postings.get(pattern, ()):
                 print(f"Found job title mention: {job_title}")
-            
-            # Add slight boost for related terms
-            for skill in job_skills:
-                if skill.lower() in resume_text_lower:
-                    job_scores[job_title] += 0.5
-            
-            print(f"Job {job_title}: Score {job_scores[job_title]}, Relevant skills: {relevant_skills}")
         
-        # Sort jobs by score in descending order
-        sorted_jobs = sorted(job_scores.items(), key=lambda x: x[1], reverse=True)
+        # Score every job with one sparse mat-vec
+        scores, ceiling = self.score_resumes([document], method, index, timings)
         
-        # Create recommendations for top 3 jobs
+        return self._recommendations_from_scores(document, scores[0], top_k, index, ceiling, method)
+
+    def _recommendations_from_scores(self, document, scores, top_k=3, index=None, ceiling=None, method="keyword"):
+        """Build the top_k recommendation entries from a row of job scores"""
+        index = index or self.index
+        resume_text = document.raw_text
+        sorted_jobs = self.select_top_jobs(scores, top_k, index)
+        
+        # Create recommendations for the top jobs
         recommendations = []
-        for job, score in sorted_jobs[:3]:
+        if ceiling is not None:
+            max_possible_score = ceiling
+        else:
+            max_possible_score = max(KEYWORD_SCORE_CEILING, sorted_jobs[0][1] if sorted_jobs else 0)  # Set minimum ceiling
+        for job, score in sorted_jobs:
+            print(f"Job {job}: Score {score}")
+            
             # Calculate confidence - normalize from 0.5 to 0.95 based on scores
-            max_possible_score = max(20, max(s for _, s in sorted_jobs))  # Set minimum ceiling
             confidence = 0.5 + ((score / max_possible_score) * 0.45)
             confidence = min(0.95, max(0.5, confidence))  # Clamp between 0.5 and 0.95
             
             # Add to recommendations
+            job_skill_set = index.job_skill_sets[job]
             recommendations.append({
                 "job_title": job,
                 "confidence": round(confidence, 2),
                 "score": score,
-                "matching_skills": [skill for skill in extracted_skills 
-                                   if skill.lower() in (s.lower() for s in self.job_skills[job])]
+                "matching_skills": [skill for pattern, skill in zip(document.skill_patterns,
+                                                                    document.extracted_skills)
+                                    if pattern in job_skill_set]
             })
         
         return {
             "resume_text": resume_text[:300] + ("..." if len(resume_text) > 300 else ""),
             "recommendations": recommendations,
-            "method": "improved-keyword-based"
+            "method": RANKING_METHODS[method]
         }
     
-    def format_recommendations_with_skills(self, resume_text, filename, recommendations, extracted_skills):
-        """Format recommendations with actual extracted skills from the resume text"""
+    def format_recommendations_with_skills(self, document, recommendations, index=None):
+        """Format recommendations with actual extracted skills from the resume"""
+        index = index or self.index
+        extracted_skills = ResumeDocument.of(document).extracted_skills
         if not recommendations:
             return {"error": "No recommendations available"}
         
@@ -619,11 +1160,11 @@ class JobRecommendationSystem:
                 present_skills = ["Communication", "Problem Solving", "Teamwork", "Adaptability"]
             
             # Get missing skills for this job title
-            missing_skills = self.missing_skills_mapping.get(job_title, 
+            missing_skills = index.missing_skills_mapping.get(job_title, 
                                               ["Leadership", "Advanced Technical Skills", "Project Management"])
             
             # Get company name
-            company = self.company_mapping.get(job_title, f"Company {i+1}")
+            company = index.company_mapping.get(job_title, f"Company {i+1}")
             
             # Calculate match percentage
             match_percent = int(job["confidence"] * 100)
@@ -660,7 +1201,7 @@ class JobRecommendationSystem:
             top_skills = top_job["skills"][:3] if len(top_job["skills"]) > 3 else top_job["skills"]
             
             # Get missing skills for this job
-            missing_skills = self.missing_skills_mapping.get(top_job_title, 
+            missing_skills = index.missing_skills_mapping.get(top_job_title, 
                                               ["Leadership", "Advanced Technical Skills", "Project Management"])
             missing_skills = missing_skills[:3]  # Limit to 3
             
@@ -677,20 +1218,135 @@ class JobRecommendationSystem:
         }
 
 
+# Uploads up to this size stay in memory; larger ones spool to an anonymous temp file
+UPLOAD_SPOOL_THRESHOLD = int(os.getenv("UPLOAD_SPOOL_THRESHOLD", 5 * 1024 * 1024))
+
+# Largest request body accepted, counted while it streams in; 0 removes the cap
+UPLOAD_MAX_BYTES = int(float(os.getenv("UPLOAD_MAX_MB", 50)) * 1024 * 1024)
+
+class ResumeUploadRequest(Request):
+    """Flask request that keeps uploaded files in memory below the spool threshold"""
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_THRESHOLD)
+
 # Create Flask application
 app = Flask(__name__)
+app.request_class = ResumeUploadRequest
+# Werkzeug stops reading the body past this and raises RequestEntityTooLarge,
+# also for chunked uploads that send no Content-Length
+app.config['MAX_CONTENT_LENGTH'] = UPLOAD_MAX_BYTES or None
 CORS(app)
 
+# Run extraction in rlimited subprocesses unless EXTRACTION_SANDBOX_WORKERS=0
+sandbox_workers = int(os.getenv("EXTRACTION_SANDBOX_WORKERS", 2))
+extraction_sandbox = SandboxedExtractor(
+    workers=sandbox_workers,
+    cpu_seconds=int(os.getenv("EXTRACTION_CPU_SECONDS", 20)),
+    memory_bytes=int(os.getenv("EXTRACTION_MEMORY_MB", 1024)) * 1024 * 1024,
+    timeout=float(os.getenv("EXTRACTION_TIMEOUT", 30))
+) if sandbox_workers else None
+
+# Extracted text cache database, next to this file unless set; an empty value disables it
+EXTRACTED_TEXT_CACHE_PATH = os.getenv(
+    "EXTRACTED_TEXT_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "extracted_text_cache.sqlite3"))
+
 # Initialize job recommendation system
-job_system = JobRecommendationSystem()
+job_system = JobRecommendationSystem(
+    pdf_max_pages=int(os.getenv("PDF_MAX_PAGES", 0)) or None,
+    pdf_time_budget=float(os.getenv("PDF_TIME_BUDGET", 0)) or None,
+    pdf_page_workers=int(os.getenv("PDF_PAGE_WORKERS", 0)),
+    sandbox=extraction_sandbox,
+    # Scale-to-zero deployments boot on the request path; FAST_START=0 loads everything eagerly
+    fast_start=os.getenv("FAST_START", "1") != "0",
+    hybrid_weights={
+        "keyword": float(os.getenv("HYBRID_KEYWORD_WEIGHT", DEFAULT_HYBRID_WEIGHTS["keyword"])),
+        "tfidf": float(os.getenv("HYBRID_TFIDF_WEIGHT", DEFAULT_HYBRID_WEIGHTS["tfidf"])),
+        "model": float(os.getenv("HYBRID_MODEL_WEIGHT", DEFAULT_HYBRID_WEIGHTS["model"]))
+    },
+    model_n_jobs=int(os.getenv("MODEL_N_JOBS", 0)) or None,
+    featurization=os.getenv("FEATURIZATION", "vocabulary"),
+    stream_text_bytes=int(float(os.getenv("STREAM_TEXT_MB", 1)) * 1024 * 1024),
+    text_cache_path=EXTRACTED_TEXT_CACHE_PATH
+)
+
+# Uploads processed at once (by default one per sandbox worker), how many more may
+# wait for a slot and for how long; past that requests are shed with 429/503
+upload_admission = AdmissionController(
+    concurrency=int(os.getenv("UPLOAD_CONCURRENCY", 0)) or sandbox_workers or os.cpu_count() or 1,
+    max_queue=int(os.getenv("UPLOAD_QUEUE_LIMIT", 8)),
+    queue_timeout=float(os.getenv("UPLOAD_QUEUE_TIMEOUT", 10))
+)
+
+# Reload the catalog when job_catalog.json or job_catalog.artifact changes; 0 disables polling
+CATALOG_WATCH_INTERVAL = float(os.getenv("CATALOG_WATCH_INTERVAL", 5))
+if CATALOG_WATCH_INTERVAL > 0:
+    job_system.watch_catalog(CATALOG_WATCH_INTERVAL)
+
+# Shared secret for /admin endpoints; without it they are disabled. A loopback
+# address is no proof of a local caller behind a reverse proxy, so none is trusted
+CATALOG_ADMIN_TOKEN = os.getenv("CATALOG_ADMIN_TOKEN")
+
+def _parse_top_k():
+    """Read the optional top_k form field, returning (top_k, error_response)"""
+    try:
+        top_k = int(request.form.get('top_k', 3))
+    except ValueError:
+        return None, (jsonify({'error': 'top_k must be an integer'}), 400)
+    if top_k < 1:
+        return None, (jsonify({'error': 'top_k must be at least 1'}), 400)
+    return top_k, None
+
+def _parse_method():
+    """Read the optional method form field, returning (method, error_response)"""
+    method = request.form.get('method', request.args.get('method', 'keyword')).strip().lower()
+    if method not in RANKING_METHODS:
+        return None, (jsonify({'error': f"method must be one of: {', '.join(RANKING_METHODS)}"}), 400)
+    return method, None
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    upload_admission.record_rejection("too_large")
+    return jsonify({'error': f'Upload is larger than the {UPLOAD_MAX_BYTES / (1024 * 1024):g} MB limit'}), 413
+
+def admission_controlled(view):
+    """Run an upload view in an upload_admission slot, shedding it when the queue is full
+    
+    Bodies declared too large are refused from the headers, before they
+    queue or are read, and so are requests that would find the queue full.
+    Everything else is parsed to count its files: a request holds one slot
+    per uploaded file, up to the concurrency, since a batch fans out to as
+    many extraction workers. Shed requests get 429 when the queue was full
+    and 503 when their wait for slots ran out, both with Retry-After.
+    """
+    @wraps(view)
+    def admitted(*args, **kwargs):
+        if UPLOAD_MAX_BYTES and (request.content_length or 0) > UPLOAD_MAX_BYTES:
+            raise RequestEntityTooLarge()
+        try:
+            # Shed under overload before Werkzeug reads and spools the body
+            upload_admission.check()
+            files = sum(1 for _, upload in request.files.items(multi=True) if upload.filename)
+            with upload_admission.slot(weight=files):
+                return view(*args, **kwargs)
+        except AdmissionRejected as e:
+            print(f"Shedding upload: {e.reason}, retry after {e.retry_after}s")
+            response = jsonify({'error': 'Server is busy, retry later', 'reason': e.reason,
+                                'retry_after': e.retry_after})
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, 429 if e.reason == "queue_full" else 503
+    return admitted
 
 @app.route('/upload_resume', methods=['POST'])
+@admission_controlled
 def upload_resume():
     """
     Accepts a resume file uploaded by the user and returns job recommendations.
     
     Expected form data:
     - resume_file: File upload
+    - top_k: Number of recommendations to return (optional, default 3)
+    - method: keyword, tfidf or hybrid ranking (optional, default keyword)
     """
     try:
         if 'resume_file' not in request.files:
@@ -701,25 +1357,100 @@ def upload_resume():
         if resume_file.filename == '':
             return jsonify({'error': 'Empty filename'}), 400
             
-        # Save the uploaded resume temporarily
-        temp_path = f"uploads/{resume_file.filename}"
-        os.makedirs("uploads", exist_ok=True)  # Ensure the directory exists
-        resume_file.save(temp_path)
-        
-        # Get job recommendations
-        result = job_system.get_recommendations(temp_path)
-        
-        # Clean up temp file
-        try:
-            os.remove(temp_path)
-        except Exception as e:
-            print(f"Warning: Could not remove temp file: {e}")
+        top_k, error = _parse_top_k()
+        if error:
+            return error
+        method, error = _parse_method()
+        if error:
+            return error
+            
+        # Extract straight from the uploaded stream, nothing is written to uploads/
+        result = job_system.get_recommendations(resume_file, top_k=top_k,
+                                                filename=resume_file.filename, method=method)
         
         return jsonify(result)
+    except RequestEntityTooLarge:
+        # The body ran over UPLOAD_MAX_BYTES while streaming in; answered by upload_too_large
+        raise
+    except ExtractionRejected as e:
+        return jsonify({'error': 'Resume could not be processed', 'message': str(e)}), 422
     except Exception as e:
         print(f"Error processing uploaded resume: {e}")
         return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
 
+@app.route('/upload_resumes', methods=['POST'])
+@admission_controlled
+def upload_resumes():
+    """
+    Accepts many resume files in one multipart request and returns job
+    recommendations for each of them, in upload order.
+    
+    Expected form data:
+    - resume_files: One or more file uploads
+    - top_k: Number of recommendations per resume (optional, default 3)
+    - method: keyword, tfidf or hybrid ranking (optional, default keyword)
+    """
+    try:
+        resume_files = [f for f in request.files.getlist('resume_files') if f.filename]
+        if not resume_files:
+            return jsonify({'error': 'No resume files uploaded'}), 400
+            
+        top_k, error = _parse_top_k()
+        if error:
+            return error
+        method, error = _parse_method()
+        if error:
+            return error
+            
+        timings = {}
+        results = job_system.get_recommendations_batch(resume_files, top_k=top_k, method=method,
+                                                       timings=timings)
+        
+        return jsonify({
+            'results': results,
+            'timings': {stage: round(seconds * 1000, 3) for stage, seconds in timings.items()}
+        })
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        print(f"Error processing uploaded resumes: {e}")
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Operational counters for the recommendation service"""
+    cache = job_system.result_cache
+    return jsonify({
+        'catalog_version': job_system.catalog_version,
+        'catalog': job_system.catalog_stats(),
+        'stage_timings': job_system.timing_stats(),
+        'model_scores_disabled': job_system.model_scores_disabled,
+        'recommendation_cache': cache.stats() if cache is not None else None,
+        'extracted_text_cache': job_system.text_cache.stats() if job_system.text_cache is not None else None,
+        'extraction_sandbox': job_system.sandbox.stats() if job_system.sandbox is not None else None,
+        'upload_admission': upload_admission.stats()
+    })
+
+@app.route('/admin/reload_catalog', methods=['POST'])
+def reload_catalog():
+    """
+    Reloads the job catalog in the background, without restarting workers.
+    
+    Send the CATALOG_ADMIN_TOKEN value in the X-Admin-Token header; without
+    that variable set the endpoint is disabled. Returns 202 straight away;
+    GET /stats shows when the new version is live.
+    """
+    if not CATALOG_ADMIN_TOKEN:
+        return jsonify({'error': 'Catalog reloads are disabled, set CATALOG_ADMIN_TOKEN to enable them'}), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), CATALOG_ADMIN_TOKEN):
+        return jsonify({'error': 'Invalid admin token'}), 403
+    
+    started = job_system.request_catalog_reload()
+    return jsonify({
+        'status': 'reload started' if started else 'reload queued',
+        'catalog_version': job_system.catalog_version
+    }), 202
+
 if __name__ == "__main__":
     print("\n===== JOB RECOMMENDATION SYSTEM API =====\n")
     print("Waiting for user resume uploads...")
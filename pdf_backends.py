@@ -0,0 +1,118 @@
+import math
+import os
+
+from pdfminer.pdfdevice import PDFTextDevice
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdffont import PDFUnicodeNotDefined
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+
+# Imported by extractors on the first PDF, so a cold start does not pay for pdfminer
+
+# A forward jump of the pen wider than this fraction of the font size is a word break
+WORD_GAP = 0.15
+
+# A baseline shift larger than this fraction of the font size is a line break;
+# superscripts and subscripts move less than that
+LINE_GAP = 0.6
+
+
+class _TextDevice(PDFTextDevice):
+    """Collects glyph text in content stream order, without layout analysis.
+
+    pdfminer's layout mode builds an object per glyph and groups them into
+    lines and boxes; here each glyph only updates the pen position, a space
+    goes in where the pen jumps forward and a newline where the baseline moves.
+    """
+
+    def __init__(self, resource_manager):
+        super().__init__(resource_manager)
+        self.pieces = []
+        self.pen = None  # (x after the last glyph, its baseline, its font size)
+
+    def take_text(self):
+        """Text collected since the last call"""
+        text = "".join(self.pieces)
+        self.pieces = []
+        self.pen = None
+        return text
+
+    def render_char(self, matrix, font, fontsize, scaling, rise, cid, ncs, graphicstate):
+        advance = font.char_width(cid) * fontsize * scaling
+        try:
+            text = font.to_unichr(cid)
+        except PDFUnicodeNotDefined:
+            # Glyphs without a unicode mapping carry no usable text
+            return advance
+        a, b, c, d, x, y = matrix
+        size = fontsize * math.hypot(c, d) or 1
+        if self.pen is not None and not text.isspace():
+            pen_x, pen_y, pen_size = self.pen
+            if abs(y - pen_y) > max(size, pen_size) * LINE_GAP:
+                self.pieces.append("\n")
+            elif (x - pen_x > min(size, pen_size) * WORD_GAP or pen_x - x > size) \
+                    and not self.pieces[-1].isspace():
+                self.pieces.append(" ")
+        self.pieces.append(text)
+        self.pen = (x + advance * a, y, size)
+        return advance
+
+
+class PdfminerDocument:
+    """Text-only pdfminer backend: the fast path, several times quicker than pdfplumber"""
+
+    name = "pdfminer"
+
+    def __init__(self, source):
+        self._file = open(source, "rb") if isinstance(source, (str, os.PathLike)) else None
+        stream = self._file or source
+        stream.seek(0)
+        self.pages = list(PDFPage.create_pages(PDFDocument(PDFParser(stream))))
+        resource_manager = PDFResourceManager(caching=True)
+        self._device = _TextDevice(resource_manager)
+        self._interpreter = PDFPageInterpreter(resource_manager, self._device)
+
+    def page_text(self, page_number):
+        self._interpreter.process_page(self.pages[page_number])
+        return self._device.take_text()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PdfplumberDocument:
+    """pdfplumber backend: slower, clusters characters into words and lines by position"""
+
+    name = "pdfplumber"
+
+    def __init__(self, source):
+        import pdfplumber
+        if not isinstance(source, (str, os.PathLike)):
+            source.seek(0)
+        self._pdf = pdfplumber.open(source)
+        self.pages = self._pdf.pages
+
+    def page_text(self, page_number):
+        # Pages without a text layer return None
+        return self.pages[page_number].extract_text() or ""
+
+    def close(self):
+        self._pdf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Tried in this order; later backends are fallbacks for PDFs the earlier ones read badly
+PDF_BACKENDS = {backend.name: backend for backend in (PdfminerDocument, PdfplumberDocument)}
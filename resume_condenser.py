@@ -0,0 +1,129 @@
+import re
+
+from resume_document import ResumeDocument
+
+# Canonical section names and the headings that introduce them
+SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "profile", "objective", "career objective", "about me"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history"],
+    "education": ["education", "academic background", "qualifications"],
+    "skills": ["skills", "technical skills", "core competencies", "competencies", "key skills"],
+    "projects": ["projects", "personal projects", "key projects"],
+    "certifications": ["certifications", "certificates", "licenses", "licenses and certifications"],
+}
+
+_HEADING_LOOKUP = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+_HEADING_PATTERN = re.compile(r"^\s*([A-Za-z][A-Za-z &/]{1,40}?)\s*:?\s*$")
+
+# Rough rule of thumb for English text with subword tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Approximate token count of text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def detect_sections(resume_text):
+    """Split a resume into known sections by their heading lines.
+
+    Returns a list of (section, start, end) character offsets in document
+    order; text before the first heading is reported as "header".
+    """
+    sections = []
+    current, start = "header", 0
+    offset = 0
+    for line in resume_text.splitlines(keepends=True):
+        match = _HEADING_PATTERN.match(line)
+        section = _HEADING_LOOKUP.get(match.group(1).strip().lower()) if match else None
+        if section:
+            if offset > start:
+                sections.append((current, start, offset))
+            current, start = section, offset + len(line)
+        offset += len(line)
+    if offset > start:
+        sections.append((current, start, offset))
+    return sections
+
+
+def _section_lines(resume_text, sections, name):
+    """Non-empty, whitespace-collapsed lines of every section called name"""
+    lines = []
+    for section, start, end in sections:
+        if section == name:
+            for line in resume_text[start:end].splitlines():
+                line = " ".join(line.split())
+                if line:
+                    lines.append(line)
+    return lines
+
+
+def condense_resume(document, job_system, token_budget=512, max_role_lines=12):
+    """Build a compact Gemini prompt from the skills, titles and recent roles in a resume.
+
+    document is a ResumeDocument or plain resume text. Parts are added in
+    priority order until token_budget is reached. Returns (prompt, report)
+    where report holds the character and token savings.
+    """
+    document = ResumeDocument.of(document)
+    resume_text = document.raw_text
+    if estimate_tokens(resume_text) <= token_budget:
+        # Short resumes already fit and are sent verbatim
+        return resume_text, _savings_report(resume_text, resume_text, token_budget)
+
+    matches = job_system.match_resume(document)
+    extracted_skills = sorted(document.extracted_skills, key=str.lower)
+    titles = sorted({job_title for pattern in matches.found
+                     for job_title, _ in job_system.title_postings.get(pattern, ())})
+
+    sections = document.sections
+    # Resumes list the most recent role first
+    roles = _section_lines(resume_text, sections, "experience")[:max_role_lines]
+    summary = _section_lines(resume_text, sections, "summary")[:3]
+
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    parts = []
+    used = 0
+
+    def add(line):
+        nonlocal used
+        if used + len(line) + 1 > budget_chars:
+            return False
+        parts.append(line)
+        used += len(line) + 1
+        return True
+
+    if extracted_skills:
+        # Keep as many skills as fit rather than dropping the whole line
+        line = "Skills: "
+        for i, skill in enumerate(extracted_skills):
+            candidate = line + (", " if i else "") + skill
+            if len(candidate) + 1 > budget_chars:
+                break
+            line = candidate
+        add(line)
+    if titles:
+        add("Job titles mentioned: " + ", ".join(titles))
+    if roles and add("Recent roles:"):
+        for role in roles:
+            if not add("- " + role):
+                break
+    if summary:
+        add("Summary: " + " ".join(summary))
+
+    prompt = "\n".join(parts) if parts else resume_text[:budget_chars]
+    return prompt, _savings_report(resume_text, prompt, token_budget)
+
+
+def _savings_report(resume_text, prompt, token_budget):
+    """Characters and estimated tokens saved by sending prompt instead of resume_text"""
+    return {
+        "original_chars": len(resume_text),
+        "condensed_chars": len(prompt),
+        "chars_saved": len(resume_text) - len(prompt),
+        "original_tokens": estimate_tokens(resume_text),
+        "condensed_tokens": estimate_tokens(prompt),
+        "tokens_saved": estimate_tokens(resume_text) - estimate_tokens(prompt),
+        "token_budget": token_budget,
+    }
@@ -0,0 +1,108 @@
+import re
+
+from similarity import TOKEN_PATTERN
+
+_TOKEN_RE = re.compile(TOKEN_PATTERN)
+
+# Characters of a streamed resume kept as its text; the rest is only matched
+STREAM_EXCERPT_CHARS = 100000
+
+
+class ResumeDocument:
+    """One resume's text, normalized and tokenized once and shared by every stage.
+
+    Token offsets index into normalized_text, section offsets into raw_text.
+    Skill matches belong to the catalog version they were computed against
+    and are recomputed only when a different catalog index asks for them.
+    
+    A document built with from_chunks is streamed: its skill matches cover
+    the whole text, but raw_text holds only the first STREAM_EXCERPT_CHARS
+    characters, which is what display, sections and the TF-IDF and model
+    scores see.
+    """
+
+    def __init__(self, raw_text, filename=None, extraction=None):
+        self.raw_text = raw_text or ""
+        self.filename = filename
+        self.extraction = extraction
+        self.normalized_text = self.raw_text.lower()
+        self.text_length = len(self.raw_text)  # of the whole text, also when streamed
+        self.streamed = False
+        self._token_offsets = None
+        self._sections = None
+
+        # Filled in by match()
+        self.catalog_version = None
+        self.matches = None
+        self.skill_ids = []  # catalog skill ids found in the resume, in catalog order
+        self.skill_patterns = []  # normalized spelling of each of those skills
+        self.extracted_skills = []  # display spelling of each of those skills
+
+    @classmethod
+    def of(cls, value):
+        """Wrap plain resume text in a document; documents are returned as they are"""
+        return value if isinstance(value, cls) else cls(value)
+
+    @classmethod
+    def from_chunks(cls, chunks, index, filename=None, extraction=None, excerpt_chars=STREAM_EXCERPT_CHARS):
+        """Match text arriving in chunks against index without ever holding all of it
+        
+        Each chunk is lowercased and fed to the skill matcher on its own, so
+        memory stays at a chunk plus the excerpt whatever the text's size.
+        """
+        scanner = index.skill_matcher.scanner()
+        excerpt = []
+        excerpt_length = 0
+        text_length = 0
+        for chunk in chunks:
+            if excerpt_length < excerpt_chars:
+                excerpt.append(chunk[:excerpt_chars - excerpt_length])
+                excerpt_length += len(excerpt[-1])
+            text_length += len(chunk)
+            scanner.feed(chunk.lower())
+        
+        document = cls("".join(excerpt), filename, extraction)
+        document.text_length = text_length
+        document.streamed = True
+        document._set_matches(scanner.finish(), index)
+        return document
+
+    def __len__(self):
+        return len(self.raw_text)
+
+    @property
+    def token_offsets(self):
+        """(start, end) of every word token in normalized_text"""
+        if self._token_offsets is None:
+            self._token_offsets = [token.span() for token in _TOKEN_RE.finditer(self.normalized_text)]
+        return self._token_offsets
+
+    def tokens(self):
+        """Word tokens of the normalized text, in order"""
+        text = self.normalized_text
+        return [text[start:end] for start, end in self.token_offsets]
+
+    @property
+    def sections(self):
+        """(section, start, end) of every detected resume section"""
+        if self._sections is None:
+            from resume_condenser import detect_sections
+            self._sections = detect_sections(self.raw_text)
+        return self._sections
+
+    def match(self, index):
+        """Scan the normalized text with index's skill matcher, once per catalog version"""
+        if self.catalog_version != index.catalog_version:
+            if self.streamed:
+                # The full text is gone; a catalog swapped in mid-request only sees the excerpt
+                print("Warning: rematching a streamed resume against its excerpt")
+            self._set_matches(index.skill_matcher.scan(self.normalized_text), index)
+        return self.matches
+
+    def _set_matches(self, matches, index):
+        """Record matches and the catalog skills they contain for index's catalog version"""
+        self.skill_ids = index.resume_skill_ids(matches)
+        self.skill_patterns = [index.skill_patterns[skill_id] for skill_id in self.skill_ids]
+        self.extracted_skills = [index.skill_labels[skill_id] for skill_id in self.skill_ids]
+        self.matches = matches
+        self.catalog_version = index.catalog_version
@@ -0,0 +1,218 @@
+import multiprocessing
+import os
+import queue
+import resource
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from extractors import extract_resume
+
+
+class ExtractionRejected(Exception):
+    """Raised when a resume breaches the sandbox CPU, memory or time limits"""
+
+
+def _address_space():
+    """Current virtual memory size of this process in bytes"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[0]) * resource.getpagesize()
+
+
+def _worker_main(conn, cpu_seconds, memory_bytes):
+    """Extraction subprocess: applies rlimits, then serves jobs until told to stop"""
+    # The PDF backends are imported lazily; load them before the limits apply
+    # so their shared libraries count toward the baseline, not the job
+    import pdf_backends
+    import pdfplumber
+    if memory_bytes:
+        # RLIMIT_RSS is not enforced on Linux, the address space limit is.
+        # The forked worker already maps the parent's libraries, so the limit
+        # is memory_bytes on top of that baseline.
+        # Only the soft limit is lowered so there is room to report a breach.
+        _, as_hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (_address_space() + memory_bytes, as_hard))
+    _, cpu_hard = resource.getrlimit(resource.RLIMIT_CPU)
+
+    def report_memory_breach():
+        """Restore the address space limit and tell the parent we ran out of memory"""
+        if memory_bytes:
+            resource.setrlimit(resource.RLIMIT_AS, (as_hard, as_hard))
+        conn.send(("memory", None))
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        except MemoryError:
+            # The upload itself does not fit under the limit
+            report_memory_breach()
+            break
+        if job is None:
+            break
+        source, filename, options = job
+
+        if cpu_seconds:
+            # RLIMIT_CPU counts the whole process lifetime, so each job gets
+            # cpu_seconds on top of what the worker has used so far
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            soft = int(usage.ru_utime + usage.ru_stime) + 1 + cpu_seconds
+            if cpu_hard != resource.RLIM_INFINITY:
+                soft = min(soft, cpu_hard)
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, cpu_hard))
+
+        try:
+            conn.send(("ok", extract_resume(source, filename, **options)))
+        except MemoryError:
+            # The heap is in an unknown state, report and let the parent replace us
+            report_memory_breach()
+            break
+
+
+class _Worker:
+    """Handle on one sandbox subprocess and its pipe"""
+
+    def __init__(self, context, cpu_seconds, memory_bytes):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, cpu_seconds, memory_bytes),
+                                       daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        """Terminate the subprocess and close the pipe"""
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class SandboxedExtractor:
+    """Reusable pool of extraction subprocesses with per-job CPU, memory and time limits.
+
+    A worker that breaches a limit is killed and replaced, and the caller gets
+    ExtractionRejected instead of a stalled or crashed web worker.
+    """
+
+    def __init__(self, workers=2, cpu_seconds=20, memory_bytes=1024 * 1024 * 1024, timeout=30):
+        self.workers = workers
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.timeout = timeout
+        # fork keeps startup cheap and avoids re-importing the Flask app
+        self._context = multiprocessing.get_context("fork")
+        # Workers are started lazily; None marks a slot without a process yet
+        self._idle = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(None)
+        self._stats_lock = threading.Lock()
+        self.jobs = 0
+        self.rejections = {"timeout": 0, "cpu": 0, "memory": 0, "crash": 0}
+        self.restarts = 0
+
+    def _spawn(self):
+        """Start a fresh worker subprocess"""
+        return _Worker(self._context, self.cpu_seconds, self.memory_bytes)
+
+    def _reject(self, worker, reason, message):
+        """Kill a worker that breached a limit and raise ExtractionRejected"""
+        worker.kill()
+        with self._stats_lock:
+            self.rejections[reason] += 1
+            self.restarts += 1
+        print(f"Extraction sandbox rejected resume: {message}")
+        raise ExtractionRejected(message)
+
+    def _send(self, worker, job):
+        """Hand job to worker, replacing it once if it died while idle; returns the worker holding the job"""
+        try:
+            worker.conn.send(job)
+            return worker
+        except OSError:
+            # The worker exited after the liveness check, so the job never reached it
+            worker.kill()
+            with self._stats_lock:
+                self.restarts += 1
+        worker = self._spawn()
+        try:
+            worker.conn.send(job)
+        except OSError as e:
+            self._reject(worker, "crash", f"extraction worker died before taking the job: {e}")
+        return worker
+
+    def extract(self, source, filename=None, **options):
+        """Extract (text, metadata) for a path, bytes or stream inside a sandbox worker"""
+        if not isinstance(source, (bytes, bytearray, str, os.PathLike)):
+            stream = getattr(source, "stream", source)
+            stream.seek(0)
+            source = stream.read()
+
+        worker = self._idle.get()
+        try:
+            if worker is not None and not worker.process.is_alive():
+                worker.kill()
+                worker = None
+            if worker is None:
+                worker = self._spawn()
+            with self._stats_lock:
+                self.jobs += 1
+
+            worker = self._send(worker, (source, filename, options))
+            if not worker.conn.poll(self.timeout):
+                self._reject(worker, "timeout", f"extraction exceeded {self.timeout}s")
+            try:
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                worker.process.join(timeout=1)
+                if worker.process.exitcode == -signal.SIGXCPU:
+                    self._reject(worker, "cpu", f"extraction exceeded {self.cpu_seconds}s of CPU time")
+                self._reject(worker, "crash", f"extraction worker died (exit code {worker.process.exitcode})")
+            if status == "memory":
+                self._reject(worker, "memory", f"extraction exceeded {self.memory_bytes // (1024 * 1024)} MB")
+            return payload
+        except ExtractionRejected:
+            worker = None
+            raise
+        finally:
+            self._idle.put(worker)
+
+    def extract_many(self, sources, **options):
+        """Extract many (source, filename) pairs across the sandbox workers.
+
+        Returns (text, metadata) per source; rejected resumes get empty text and
+        the rejection reason in metadata["error"].
+        """
+        def extract_one(item):
+            source, filename = item
+            try:
+                return self.extract(source, filename, **options)
+            except ExtractionRejected as e:
+                return "", {"error": str(e), "rejected": True}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(extract_one, sources))
+
+    def shutdown(self):
+        """Stop every idle worker"""
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+                worker.kill()
+
+    def stats(self):
+        """Counters for monitoring the sandbox"""
+        with self._stats_lock:
+            return {
+                "workers": self.workers,
+                "jobs": self.jobs,
+                "rejections": dict(self.rejections),
+                "restarts": self.restarts,
+            }
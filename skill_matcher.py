@@ -0,0 +1,182 @@
+from collections import deque
+
+
+def _is_word_char(ch):
+    """Same definition of a word character as the regex \\w class"""
+    return ch.isalnum() or ch == "_"
+
+
+class SkillMatches:
+    """Patterns found by one scan of a resume"""
+
+    def __init__(self, found, bounded):
+        # Patterns that occur anywhere in the text (plain substring match)
+        self.found = found
+        # Patterns that occur at least once between regex word boundaries
+        self.bounded = bounded
+
+    def __contains__(self, pattern):
+        return pattern in self.found
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton that finds every skill and job title in one pass"""
+
+    def __init__(self, patterns):
+        # State 0 is the root; each state has goto edges, a failure link
+        # and the pattern ids that end in it (including via failure links)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self.patterns = []
+        self._pattern_ids = {}
+
+        for pattern in patterns:
+            self._add_pattern(pattern)
+        self._build_failure_links()
+        self.max_pattern_length = max(map(len, self.patterns), default=0)
+
+    def _add_pattern(self, pattern):
+        """Insert a lowercased pattern into the trie"""
+        if not pattern or pattern in self._pattern_ids:
+            return
+        pattern_id = len(self.patterns)
+        self.patterns.append(pattern)
+        self._pattern_ids[pattern] = pattern_id
+
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][ch] = next_state
+            state = next_state
+        self._out[state].append(pattern_id)
+
+    def _build_failure_links(self):
+        """Breadth-first construction of failure links and merged outputs"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._out[child].extend(self._out[self._fail[child]])
+        # Tuples are cheaper to iterate in the scan loop
+        self._out = [tuple(ids) for ids in self._out]
+
+    def pattern_id(self, pattern):
+        """Position of pattern in self.patterns, or None if it is not a pattern"""
+        return self._pattern_ids.get(pattern)
+
+    def tables(self):
+        """Export the automaton as (goto, fail, out) for compiling into an artifact"""
+        return self._goto, self._fail, self._out
+
+    @classmethod
+    def from_tables(cls, patterns, goto, fail, out):
+        """Rebuild a matcher from precomputed tables without re-running construction"""
+        matcher = cls.__new__(cls)
+        matcher.patterns = list(patterns)
+        matcher._pattern_ids = {pattern: i for i, pattern in enumerate(matcher.patterns)}
+        matcher._goto = goto
+        matcher._fail = fail
+        matcher._out = [tuple(ids) for ids in out]
+        matcher.max_pattern_length = max(map(len, matcher.patterns), default=0)
+        return matcher
+
+    def scanner(self):
+        """Start an incremental scan of text that arrives in chunks"""
+        return SkillScanner(self)
+
+    def scan(self, text):
+        """Scan already-lowercased text once and report every pattern found"""
+        scanner = SkillScanner(self)
+        scanner.feed(text)
+        return scanner.finish()
+
+
+class SkillScanner:
+    """One scan fed chunk by chunk, e.g. a large file read piece by piece.
+
+    feed() lowercased chunks in order, then finish(); the result is the same
+    as SkillMatcher.scan on the whole text. Between chunks only the automaton
+    state, the last max_pattern_length characters (for the word boundary
+    before a match) and the matches ending on the last character (waiting for
+    the character after them) are kept, so memory does not grow with the text.
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.found = set()
+        self.bounded = set()
+        self._state = 0
+        self._tail = ""
+        self._pending = []  # (pattern, boundary before it is right), matches ending on the last character
+
+    def _settle_pending(self, after):
+        """Finish the boundary check of matches that ended on the previous chunk's last character"""
+        for pattern, before_ok in self._pending:
+            if before_ok and after != _is_word_char(pattern[-1]):
+                self.bounded.add(pattern)
+        self._pending = []
+
+    def feed(self, text):
+        """Scan the next chunk of already-lowercased text"""
+        if not text:
+            return
+        if self._pending:
+            self._settle_pending(_is_word_char(text[0]))
+
+        matcher = self.matcher
+        goto = matcher._goto
+        fail = matcher._fail
+        out = matcher._out
+        patterns = matcher.patterns
+        found = self.found
+        bounded = self.bounded
+
+        # Positions below are in window; the tail supplies the characters before this chunk
+        window = self._tail + text
+        window_len = len(window)
+        state = self._state
+
+        for end, ch in enumerate(text, len(self._tail)):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+
+            for pattern_id in out[state]:
+                pattern = patterns[pattern_id]
+                found.add(pattern)
+                if pattern in bounded:
+                    continue
+                start = end - len(pattern) + 1
+                # Emulate r'\b' + pattern + r'\b' on both sides of the match
+                before = start > 0 and _is_word_char(window[start - 1])
+                before_ok = before != _is_word_char(pattern[0])
+                if end + 1 == window_len:
+                    # The character after the match is in the next chunk, if there is one
+                    self._pending.append((pattern, before_ok))
+                    continue
+                after = _is_word_char(window[end + 1])
+                if before_ok and after != _is_word_char(pattern[-1]):
+                    bounded.add(pattern)
+
+        self._state = state
+        # A pattern ending in the next chunk starts at most max_pattern_length - 1
+        # characters back, and its boundary check needs one more before that
+        self._tail = window[-matcher.max_pattern_length:] if matcher.max_pattern_length else ""
+
+    def finish(self):
+        """End of text: settle the last matches and return the SkillMatches"""
+        self._settle_pending(False)
+        return SkillMatches(self.found, self.bounded)
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+# The modules under test live at the repository root, not in a package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def model_module(monkeypatch):
+    # Keep the import light: no sandbox workers, catalog watcher or text cache file
+    for name, value in {"EXTRACTION_SANDBOX_WORKERS": "0", "CATALOG_WATCH_INTERVAL": "0",
+                        "EXTRACTED_TEXT_CACHE_PATH": "", "FAST_START": "1"}.items():
+        monkeypatch.setenv(name, value)
+    return pytest.importorskip("model")
+
+
+@pytest.fixture
+def app_module(model_module):
+    """The Gemini dashboard app, imported with the same light settings as model"""
+    return pytest.importorskip("app")
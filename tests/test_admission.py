@@ -0,0 +1,199 @@
+import io
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected
+
+
+def hold_slot(controller, entered, release, weight=1):
+    """Thread body: take slots and keep them until release is set"""
+    with controller.slot(weight):
+        entered.set()
+        release.wait(5)
+
+
+def start_holder(controller, weight=1):
+    entered, release = threading.Event(), threading.Event()
+    thread = threading.Thread(target=hold_slot, args=(controller, entered, release, weight))
+    thread.start()
+    assert entered.wait(5)
+    return thread, release
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_admits_when_a_slot_is_free():
+    controller = AdmissionController(concurrency=1, max_queue=1, queue_timeout=1)
+    with controller.slot():
+        assert controller.stats()["active"] == 1
+    stats = controller.stats()
+    assert (stats["active"], stats["admitted"]) == (0, 1)
+
+
+def test_queue_full_and_queue_timeout():
+    controller = AdmissionController(concurrency=1, max_queue=1, queue_timeout=0.3)
+    holder, release = start_holder(controller)
+    rejections = []
+
+    def queued():
+        try:
+            with controller.slot():
+                pass
+        except AdmissionRejected as e:
+            rejections.append(e)
+
+    waiter = threading.Thread(target=queued)
+    waiter.start()
+    wait_for(lambda: controller.stats()["queue_depth"] == 1)
+
+    # The slot is held and the queue is full: shed straight away
+    with pytest.raises(AdmissionRejected) as excinfo:
+        with controller.slot():
+            pass
+    assert excinfo.value.reason == "queue_full"
+    assert controller.MIN_RETRY_AFTER <= excinfo.value.retry_after <= controller.MAX_RETRY_AFTER
+
+    # The queued request gives up once queue_timeout passes
+    waiter.join(5)
+    assert [e.reason for e in rejections] == ["queue_timeout"]
+    assert rejections[0].retry_after >= controller.MIN_RETRY_AFTER
+
+    release.set()
+    holder.join(5)
+    stats = controller.stats()
+    assert stats["rejections"]["queue_full"] == 1
+    assert stats["rejections"]["queue_timeout"] == 1
+    assert (stats["active"], stats["queue_depth"]) == (0, 0)
+
+
+def test_queued_request_gets_the_released_slot():
+    controller = AdmissionController(concurrency=1, max_queue=1, queue_timeout=5)
+    holder, release = start_holder(controller)
+    admitted = threading.Event()
+
+    def queued():
+        with controller.slot():
+            admitted.set()
+
+    waiter = threading.Thread(target=queued)
+    waiter.start()
+    wait_for(lambda: controller.stats()["queue_depth"] == 1)
+    assert not admitted.is_set()
+    release.set()
+    assert admitted.wait(5)
+    holder.join(5)
+    waiter.join(5)
+    assert controller.stats()["admitted"] == 2
+
+
+def test_check_sheds_only_when_the_queue_is_full():
+    controller = AdmissionController(concurrency=1, max_queue=0, queue_timeout=1)
+    controller.check()
+    holder, release = start_holder(controller)
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.check()
+    assert excinfo.value.reason == "queue_full"
+    assert controller.stats()["rejections"]["queue_full"] == 1
+    release.set()
+    holder.join(5)
+    controller.check()
+
+
+def test_weighted_slots_are_capped_at_concurrency():
+    controller = AdmissionController(concurrency=2, max_queue=0, queue_timeout=1)
+    # A batch of five files takes every slot, not more than exist
+    holder, release = start_holder(controller, weight=5)
+    assert controller.stats()["active"] == 2
+    with pytest.raises(AdmissionRejected):
+        with controller.slot():
+            pass
+    release.set()
+    holder.join(5)
+    assert controller.stats()["active"] == 0
+
+
+def test_upload_endpoint_status_codes(model_module, monkeypatch):
+    from flask import Flask
+
+    controller = AdmissionController(concurrency=1, max_queue=0, queue_timeout=0.1)
+    monkeypatch.setattr(model_module, "upload_admission", controller)
+    app = Flask(__name__)
+    app.add_url_rule("/upload", "upload", model_module.admission_controlled(lambda: "ok"), methods=["POST"])
+    client = app.test_client()
+
+    assert client.post("/upload").status_code == 200
+
+    holder, release = start_holder(controller)
+    try:
+        response = client.post("/upload")
+        assert response.status_code == 429
+        assert response.get_json()["reason"] == "queue_full"
+        assert int(response.headers["Retry-After"]) >= 1
+
+        controller.max_queue = 1
+        response = client.post("/upload")
+        assert response.status_code == 503
+        assert response.get_json()["reason"] == "queue_timeout"
+        assert int(response.headers["Retry-After"]) >= 1
+    finally:
+        release.set()
+        holder.join(5)
+
+
+class CountingStream(io.BytesIO):
+    """Request body that records how many bytes the server read from it"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+    def readline(self, size=-1):
+        line = super().readline(size)
+        self.bytes_read += len(line)
+        return line
+
+    def readinto(self, buffer):
+        count = super().readinto(buffer)
+        self.bytes_read += count
+        return count
+
+
+def test_full_queue_is_shed_before_the_body_is_read(model_module, monkeypatch):
+    from flask import Flask
+
+    controller = AdmissionController(concurrency=1, max_queue=0, queue_timeout=0.1)
+    monkeypatch.setattr(model_module, "upload_admission", controller)
+    app = Flask(__name__)
+    app.add_url_rule("/upload", "upload", model_module.admission_controlled(lambda: "ok"), methods=["POST"])
+    client = app.test_client()
+
+    body = (b"--x\r\nContent-Disposition: form-data; name=\"resume_file\"; filename=\"r.txt\"\r\n"
+            b"Content-Type: text/plain\r\n\r\n" + b"python " * 10000 + b"\r\n--x--\r\n")
+    holder, release = start_holder(controller)
+    try:
+        stream = CountingStream(body)
+        response = client.post("/upload", input_stream=stream, content_length=len(body),
+                               content_type="multipart/form-data; boundary=x")
+        assert response.status_code == 429
+        assert stream.bytes_read == 0
+    finally:
+        release.set()
+        holder.join(5)
+
+    stream = CountingStream(body)
+    response = client.post("/upload", input_stream=stream, content_length=len(body),
+                           content_type="multipart/form-data; boundary=x")
+    assert response.status_code == 200
+    assert stream.bytes_read == len(body)
@@ -0,0 +1,30 @@
+import io
+import zipfile
+
+from extractors import extract_docx_text
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def docx(body):
+    """A minimal DOCX whose document body is the given WordprocessingML"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("[Content_Types].xml", '<?xml version="1.0"?><Types/>')
+        archive.writestr("word/document.xml",
+                         f'<?xml version="1.0"?><w:document xmlns:w="{W}"><w:body>{body}</w:body></w:document>')
+    buffer.seek(0)
+    return buffer
+
+
+def test_tab_stop_definitions_are_not_text():
+    body = ('<w:p><w:pPr><w:tabs><w:tab w:val="left" w:pos="2880"/><w:tab w:val="right" w:pos="9360"/>'
+            '</w:tabs></w:pPr><w:r><w:t>Skills: python</w:t></w:r></w:p>')
+    text, _ = extract_docx_text(docx(body))
+    assert text == "Skills: python"
+
+
+def test_tabs_in_runs_are_kept():
+    body = '<w:p><w:r><w:t>Python</w:t><w:tab/><w:t>5 years</w:t></w:r></w:p>'
+    text, _ = extract_docx_text(docx(body))
+    assert text == "Python\t5 years"
@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from gemini_client import CircuitBreaker
+from resume_document import ResumeDocument
+
+
+def half_open_breaker():
+    """A breaker whose reset timeout has passed, so the next allow() claims its single trial"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout - 1
+    return breaker
+
+
+def test_cancel_trial_frees_the_half_open_trial():
+    breaker = half_open_breaker()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.cancel_trial()
+    assert breaker.allow()
+
+
+@pytest.fixture
+def hedged(app_module, monkeypatch):
+    """hedged_recommendations with a half-open breaker and a single Gemini slot"""
+    breaker = half_open_breaker()
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(app_module, "gemini_breaker", breaker)
+    monkeypatch.setattr(app_module, "gemini_slots", slots)
+    document = ResumeDocument("python developer with sql and machine learning", "resume.txt")
+
+    def call():
+        with app_module.app.test_request_context():
+            response, status = app_module.hedged_recommendations({}, "key", document)
+            return response.get_json(), status
+    return call, breaker, slots
+
+
+def test_saturated_call_leaves_the_trial_for_later(hedged):
+    call, breaker, slots = hedged
+    assert slots.acquire(blocking=False)
+    body, status = call()
+    assert (status, body["fallbackReason"]) == (200, "saturated")
+    slots.release()
+    # The trial was never claimed, so Gemini can still be probed
+    assert breaker.allow()
+
+
+def test_failed_submit_cancels_the_trial(hedged, app_module, monkeypatch):
+    call, breaker, slots = hedged
+
+    class BrokenExecutor:
+        def submit(self, *args, **kwargs):
+            raise RuntimeError("executor shut down")
+
+    monkeypatch.setattr(app_module, "gemini_executor", BrokenExecutor())
+    with pytest.raises(RuntimeError):
+        call()
+    assert slots.acquire(blocking=False)
+    slots.release()
+    assert breaker.allow()
@@ -0,0 +1,42 @@
+import os
+import threading
+
+import pytest
+
+from conftest import ROOT
+
+
+def build_without_model(model_module, tmp_path, fast_start):
+    """System with the shipped vectorizer and catalog but no model artifact or pickle"""
+    return model_module.JobRecommendationSystem(
+        model_path=str(tmp_path / "model.pkl"),
+        model_artifact_path=str(tmp_path / "model.artifact"),
+        vectorizer_path=os.path.join(ROOT, "vectorizer.pkl"),
+        vectorizer_artifact_path=os.path.join(ROOT, "vectorizer.artifact"),
+        job_mapping_path=os.path.join(ROOT, "job_titles.json"),
+        catalog_path=os.path.join(ROOT, "job_catalog.json"),
+        compiled_catalog_path=os.path.join(ROOT, "job_catalog.artifact"),
+        text_cache_path=None,
+        fast_start=fast_start)
+
+
+def probabilities_in_thread(system, texts):
+    """model_probabilities run on a thread, so a deadlock fails the test instead of hanging it"""
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("scores", system.model_probabilities(texts)),
+                              daemon=True)
+    thread.start()
+    thread.join(60)
+    assert not thread.is_alive(), "model_probabilities did not return"
+    return result["scores"]
+
+
+@pytest.mark.parametrize("fast_start", [True, False])
+def test_default_model_scores_without_model_files(model_module, tmp_path, fast_start):
+    system = build_without_model(model_module, tmp_path, fast_start)
+    scores = probabilities_in_thread(system, ["python machine learning and sql", "bread and pastry"])
+    assert scores is not None
+    assert scores.shape == (2, len(system.index.job_index_titles))
+    assert system.model_scores_disabled is None
+    # Outside fast-start mode the default model is saved for the next start
+    assert (tmp_path / "model.pkl").exists() == (not fast_start)
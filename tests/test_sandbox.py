@@ -0,0 +1,30 @@
+import os
+import signal
+
+import pytest
+
+from sandbox import SandboxedExtractor
+
+
+@pytest.fixture
+def sandbox():
+    extractor = SandboxedExtractor(workers=1, cpu_seconds=20, memory_bytes=0, timeout=30)
+    yield extractor
+    extractor.shutdown()
+
+
+def test_worker_that_died_while_idle_is_replaced(sandbox):
+    text, _ = sandbox.extract(b"python developer", "first.txt")
+    assert text == "python developer"
+
+    # Kill the idle worker and hide its death from the liveness check, as when
+    # it exits between that check and the send
+    worker = sandbox._idle.get()
+    os.kill(worker.process.pid, signal.SIGKILL)
+    worker.process.join(5)
+    worker.process.is_alive = lambda: True
+    sandbox._idle.put(worker)
+
+    text, _ = sandbox.extract(b"sql analyst", "second.txt")
+    assert text == "sql analyst"
+    assert sandbox.stats()["restarts"] == 1
@@ -0,0 +1,85 @@
+import random
+import re
+
+import pytest
+
+from skill_matcher import SkillMatcher
+
+PATTERNS = ["c", "c++", "c#", "java", "javascript", "node.js", ".net", "sql", "machine learning",
+            "learning", "r", "go", "ux", "ui/ux", "a b"]
+ALPHABET = "abcgjlnoqrstuvx +#./_-\n"
+
+
+def regex_matches(text, patterns):
+    """What the scan must report: substring hits, and hits between regex word boundaries"""
+    found = {pattern for pattern in patterns if pattern in text}
+    bounded = {pattern for pattern in found if re.search(r"\b" + re.escape(pattern) + r"\b", text)}
+    return found, bounded
+
+
+def scan_in_chunks(matcher, text, sizes):
+    scanner = matcher.scanner()
+    start = 0
+    for size in sizes:
+        scanner.feed(text[start:start + size])
+        start += size
+    scanner.feed(text[start:])
+    return scanner.finish()
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return SkillMatcher(PATTERNS)
+
+
+def random_text(rng):
+    words = [rng.choice(PATTERNS) for _ in range(rng.randint(0, 12))]
+    noise = ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 6))) for _ in words]
+    return "".join(word + gap for word, gap in zip(words, noise))
+
+
+def test_chunked_scan_matches_whole_scan(matcher):
+    rng = random.Random(1234)
+    for _ in range(500):
+        text = random_text(rng)
+        whole = matcher.scan(text)
+        expected_found, expected_bounded = regex_matches(text, PATTERNS)
+        assert (whole.found, whole.bounded) == (expected_found, expected_bounded), text
+        sizes = [rng.randint(1, 5) for _ in range(rng.randint(0, 10))]
+        chunked = scan_in_chunks(matcher, text, sizes)
+        assert (chunked.found, chunked.bounded) == (whole.found, whole.bounded), (text, sizes)
+
+
+def test_single_character_chunks(matcher):
+    text = "ran node.js, c++ and machine learning on .net"
+    chunked = scan_in_chunks(matcher, text, [1] * len(text))
+    whole = matcher.scan(text)
+    assert (chunked.found, chunked.bounded) == (whole.found, whole.bounded)
+    assert {"node.js", "machine learning"} <= chunked.bounded
+
+
+def test_match_split_across_chunks_uses_the_tail(matcher):
+    # "javascript" is split between chunks; the word before it comes from the tail
+    text = "xjava" + "script"
+    assert "javascript" not in scan_in_chunks(matcher, text, [5]).bounded
+    text = " java" + "script"
+    assert "javascript" in scan_in_chunks(matcher, text, [5]).bounded
+    # The longest pattern needs the whole tail: its last character alone is in the new chunk
+    text = "xmachine learnin" + "g"
+    assert "machine learning" not in scan_in_chunks(matcher, text, [16]).bounded
+    assert "machine learning" in scan_in_chunks(matcher, text[1:], [15]).bounded
+
+
+def test_boundary_after_match_waits_for_next_chunk(matcher):
+    # "java" ends the first chunk; whether it is a word depends on the next character
+    assert "java" in scan_in_chunks(matcher, "java ok", [4]).bounded
+    assert "java" not in scan_in_chunks(matcher, "javax", [4]).bounded
+    # At the end of the text finish() settles the pending match
+    assert "java" in scan_in_chunks(matcher, "java", [4]).bounded
+
+
+def test_empty_chunks_are_ignored(matcher):
+    scanner = matcher.scanner()
+    for chunk in ["", "sq", "", "l", ""]:
+        scanner.feed(chunk)
+    assert "sql" in scanner.finish().bounded